@@ -0,0 +1,60 @@
+# Generation time of engine.dungeon levels, whole-level and per chunk (the
+# cost of a chunk generated lazily as the camera approaches it), plus the
+# NavGrid update for the generated tiles.
+#
+#   python benchmarks/bench_dungeon.py [--sizes 256 1024] [--seed 1]
+#
+# The script fails if generating the chunks in a shuffled order gives a
+# different level than generating them all at once.
+import os
+import sys
+import time
+import random
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from engine.dungeon import Dungeon
+from engine.navgrid import NavGrid
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[256, 1024])
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--chunk', type=int, default=32)
+    args = parser.parse_args()
+
+    print(f'{"level":>10} {"chunks":>7} {"full ms":>9} {"chunk p50":>10} {"max":>7} {"nav ms":>8} {"floor %":>8}')
+    for size in args.sizes:
+        full = Dungeon(args.seed, size, size, args.chunk)
+        t0 = time.perf_counter()
+        full.generate_all()
+        full_ms = (time.perf_counter() - t0) * 1000.0
+
+        lazy = Dungeon(args.seed, size, size, args.chunk)
+        order = [(cx, cy) for cy in range(lazy.chunks_y) for cx in range(lazy.chunks_x)]
+        random.Random(args.seed).shuffle(order)
+        samples = []
+        for cx, cy in order:
+            t0 = time.perf_counter()
+            lazy.generate_chunk(cx, cy)
+            samples.append((time.perf_counter() - t0) * 1000.0)
+        if lazy.gids != full.gids:
+            raise SystemExit(f'{size}x{size}: lazy generation differs from the full level')
+        samples.sort()
+
+        nav = NavGrid(size, size, bytearray(size * size))
+        t0 = time.perf_counter()
+        for cx, cy in order:
+            x, y, w, h = full.chunk_rect(cx, cy)
+            nav.set_region(x, y, w, h, full.gids, full.floor_gids, {full.room_gid})
+        nav_ms = (time.perf_counter() - t0) * 1000.0
+        floor = 100.0 * len(nav.floor_cells) / (size * size)
+        print(f'{f"{size}x{size}":>10} {len(order):>7} {full_ms:>9.1f} {samples[len(samples) // 2]:>7.3f} ms '
+              f'{samples[-1]:>7.3f} {nav_ms:>8.1f} {floor:>7.1f}%')
+
+
+if __name__ == '__main__':
+    main()
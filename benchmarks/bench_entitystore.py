@@ -0,0 +1,95 @@
+# Scalar Enemy.update vs the batched NumPy path of engine.entitystore.
+#
+#   python benchmarks/bench_entitystore.py [--enemies 10000] [--ticks 120]
+#
+# Both runs start from the same seed and the same enemy population; the
+# script fails if any enemy field, cell or the RNG state differs afterwards.
+import os
+import sys
+import time
+import random
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import headless
+from engine.entitystore import FIELD_NAMES
+
+DT = 1.0 / 60.0
+
+
+def populate(game, seed, count, batched):
+    game.set_batched_enemies(False)
+    for e in list(game.enemies):
+        game.untrack_entity(e)
+    game.enemies.clear()
+    game.ai.clear()
+    random.seed(seed)
+    game.reseed(seed)
+    game.set_batched_enemies(batched)
+    cells = game.level.nav.floor_cells
+    for k in range(count):
+        cx, cy = random.choice(cells)
+        game.add_enemy(game.entities.Enemy(cx, cy, 3, 3, persistent=(k % 3 == 0),
+                                           visible_duration=random.uniform(0.5, 4.0),
+                                           chase_time=random.uniform(0.0, 2.0)))
+    # started after spawning so the batched run also goes through the
+    # shuffle and EntityStore.reorder()
+    game.start_game()
+    game.hero.hp = 10 ** 9
+    game.spawn_interval = 0.25
+    game.enemy_spawn_timer = 0.0
+    game.max_enemies = count * 2
+
+
+def simulate(game, ticks):
+    from pgzero.keyboard import keys
+    moves = random.Random(7)
+    t0 = time.perf_counter()
+    for tick in range(ticks):
+        if tick % 15 == 0:
+            game.on_key_down(moves.choice((keys.LEFT, keys.RIGHT, keys.UP, keys.DOWN)))
+        game.update(DT)
+    return time.perf_counter() - t0
+
+
+def capture(game):
+    rows = []
+    for e in game.enemies:
+        rows.append(tuple(getattr(e, name) for name in FIELD_NAMES) + (e.cell_x, e.cell_y))
+    return rows, game.rng.getstate()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--enemies', type=int, default=10000)
+    parser.add_argument('--ticks', type=int, default=120)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    game = headless.load_game()
+
+    populate(game, args.seed, args.enemies, False)
+    scalar_s = simulate(game, args.ticks)
+    scalar = capture(game)
+
+    populate(game, args.seed, args.enemies, True)
+    batched_s = simulate(game, args.ticks)
+    batched = capture(game)
+    game.set_batched_enemies(False)
+
+    print(f'enemies: {args.enemies} (alive after {args.ticks} ticks: {len(scalar[0])})')
+    print(f'scalar : {scalar_s / args.ticks * 1000.0:8.3f} ms/tick')
+    print(f'batched: {batched_s / args.ticks * 1000.0:8.3f} ms/tick')
+    if scalar != batched:
+        for i, (a, b) in enumerate(zip(scalar[0], batched[0])):
+            if a != b:
+                print(f'first mismatch at enemy {i}:\n  scalar  {a}\n  batched {b}')
+                break
+        raise SystemExit('batched path diverged from the scalar path')
+    print('identical results')
+
+
+if __name__ == '__main__':
+    main()
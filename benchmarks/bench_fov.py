@@ -0,0 +1,115 @@
+# Field of view (engine.fov) checked against a direct transcription of
+# symmetric shadowcasting with Fraction slopes, plus the cost of a cast.
+#
+#   python benchmarks/bench_fov.py [--grids 30] [--size 20 16] [--radius 8]
+#
+# On random grids, every floor cell's visible set must match the reference,
+# and A must see B exactly when B sees A. The script fails on any mismatch.
+import os
+import sys
+import math
+import time
+import random
+import argparse
+from fractions import Fraction
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from engine.fov import FieldOfView
+from engine.navgrid import NavGrid
+
+
+def reference(nav, origin):
+    # Albert Ford's algorithm as published, with exact Fraction slopes and
+    # no radius; (x, y) cells
+    w, h = nav.width, nav.height
+    ox, oy = origin
+    visible = {origin}
+    quadrants = (lambda d, c: (ox + c, oy - d), lambda d, c: (ox + c, oy + d),
+                 lambda d, c: (ox + d, oy + c), lambda d, c: (ox - d, oy + c))
+
+    def scan(cell, depth, start, end):
+        prev = None
+        for col in range(math.floor(depth * start + Fraction(1, 2)), math.ceil(depth * end - Fraction(1, 2)) + 1):
+            x, y = cell(depth, col)
+            wall = not nav.is_walkable(x, y)
+            if (wall or depth * start <= col <= depth * end) and 0 <= x < w and 0 <= y < h:
+                visible.add((x, y))
+            if prev is True and not wall:
+                start = Fraction(2 * col - 1, 2 * depth)
+            if prev is False and wall:
+                scan(cell, depth + 1, start, Fraction(2 * col - 1, 2 * depth))
+            prev = wall
+        if prev is False:
+            scan(cell, depth + 1, start, end)
+
+    for cell in quadrants:
+        scan(cell, 1, Fraction(-1), Fraction(1))
+    return visible
+
+
+def random_grid(rng, w, h, walls):
+    return NavGrid(w, h, bytearray(0 if rng.random() < walls else 1 for _ in range(w * h)))
+
+
+def check(nav):
+    # mismatches against the reference and asymmetric pairs
+    w = nav.width
+    fov = FieldOfView(nav, radius=nav.width + nav.height)
+    floors = nav.floor_cells
+    seen = {cell: fov.compute(cell) for cell in floors}
+    wrong = asymmetric = 0
+    for a in floors:
+        if {(i % w, i // w) for i in seen[a]} != reference(nav, a):
+            wrong += 1
+        ia = a[1] * w + a[0]
+        for b in floors:
+            if (b[1] * w + b[0] in seen[a]) != (ia in seen[b]):
+                asymmetric += 1
+    return wrong, asymmetric
+
+
+def cast_ms(nav, radius, runs):
+    fov = FieldOfView(nav, radius)
+    cells = nav.floor_cells
+    rng = random.Random(0)
+    origins = [rng.choice(cells) for _ in range(runs)]
+    t0 = time.perf_counter()
+    for origin in origins:
+        fov._cast(origin, radius)
+    return (time.perf_counter() - t0) / runs * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--grids', type=int, default=30)
+    parser.add_argument('--size', type=int, nargs=2, default=[20, 16])
+    parser.add_argument('--walls', type=float, default=0.3, help='share of blocking cells')
+    parser.add_argument('--radius', type=int, default=8)
+    parser.add_argument('--runs', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    w, h = args.size
+    wrong = asymmetric = origins = 0
+    for _ in range(args.grids):
+        nav = random_grid(rng, w, h, args.walls)
+        a, b = check(nav)
+        wrong += a
+        asymmetric += b
+        origins += len(nav.floor_cells)
+    print(f'{args.grids} grids of {w}x{h}, {origins} origins: {wrong} differ from the reference, '
+          f'{asymmetric} asymmetric pairs')
+
+    print(f'cast, radius {args.radius}:')
+    print(f'  open 64x64     {cast_ms(NavGrid(64, 64), args.radius, args.runs):8.3f} ms')
+    print(f'  30% walls      {cast_ms(random_grid(rng, 64, 64, 0.3), args.radius, args.runs):8.3f} ms')
+    if wrong or asymmetric:
+        raise SystemExit('field of view differs from the reference shadowcasting')
+    print('matches the reference')
+
+
+if __name__ == '__main__':
+    main()
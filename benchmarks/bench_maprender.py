@@ -0,0 +1,126 @@
+# Frame-time comparison between the per-cell tile blits that draw_game used to
+# do every frame and the cached background chunks of engine.maprender, both
+# for the whole map and for a fixed 640x480 camera viewport.
+#
+#   python benchmarks/bench_maprender.py [--frames 200] [--scale 1 4 16]
+#
+# --scale repeats the sample map N times in each direction to emulate bigger
+# TMX maps. The full-map columns are skipped above --full-limit cells.
+import os
+import sys
+import time
+import argparse
+import xml.etree.ElementTree as ET
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pygame
+
+from engine.camera import Camera
+from engine.maprender import MapRenderer, GRID_COLOR
+
+CELL = 48
+VIEW = (640, 480)
+TILES_DIR = os.path.join(ROOT, 'kenney_tiny-dungeon', 'Tiles')
+TMX_PATH = os.path.join(ROOT, 'kenney_tiny-dungeon', 'Tiled', 'sampleMap.tmx')
+
+tile_cache = {}
+
+
+def load_tile(index):
+    if index in tile_cache:
+        return tile_cache[index]
+    path = os.path.join(TILES_DIR, f'tile_{index-1:04d}.png')
+    img = None
+    if os.path.exists(path):
+        img = pygame.transform.scale(pygame.image.load(path).convert_alpha(), (CELL, CELL))
+    tile_cache[index] = img
+    return img
+
+
+def load_dungeon_layer():
+    root = ET.parse(TMX_PATH).getroot()
+    w, h = int(root.get('width')), int(root.get('height'))
+    for lyr in root.findall('layer'):
+        if lyr.get('name') == 'Dungeon':
+            text = lyr.find('data').text
+            gids = [int(x) & 0x1FFFFFFF for x in text.replace('\n', '').split(',') if x.strip()]
+            return w, h, gids
+    raise SystemExit('Dungeon layer not found')
+
+
+def tile_map(w, h, gids, scale):
+    out = []
+    for _ in range(scale):
+        for y in range(h):
+            row = gids[y * w:(y + 1) * w]
+            out.extend(row * scale)
+    return w * scale, h * scale, out
+
+
+def per_cell_frame(surface, w, h, gids):
+    for gx in range(w):
+        for gy in range(h):
+            idx = gids[gy * w + gx]
+            img = load_tile(idx) if idx > 0 else None
+            if img is not None:
+                surface.blit(img, (gx * CELL, gy * CELL))
+            else:
+                pygame.draw.rect(surface, GRID_COLOR, (gx * CELL, gy * CELL, CELL, CELL), 1)
+
+
+def time_frames(fn, frames):
+    samples = []
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000.0, samples[int(len(samples) * 0.95) - 1] * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--scale', type=int, nargs='+', default=[1, 2, 4, 16])
+    parser.add_argument('--full-limit', type=int, default=128 * 80)
+    args = parser.parse_args()
+
+    pygame.display.init()
+    base_w, base_h, base_gids = load_dungeon_layer()
+    print(f'{"map":>10} {"per-cell p50":>13} {"p95":>8} {"cached p50":>11} {"p95":>8} {"view p50":>9} {"p95":>8}')
+    for scale in args.scale:
+        w, h, gids = tile_map(base_w, base_h, base_gids, scale)
+        old = new = None
+        if w * h <= args.full_limit:
+            screen = pygame.display.set_mode((w * CELL, h * CELL))
+            renderer = MapRenderer(load_tile, CELL, w, h, [gids])
+            # warm the tile and chunk caches so both paths measure blitting only
+            per_cell_frame(screen, w, h, gids)
+            renderer.bake()
+            old = time_frames(lambda: per_cell_frame(screen, w, h, gids), args.frames)
+            new = time_frames(lambda: renderer.draw(screen), args.frames)
+
+        # fixed window scrolling across the map, as the game does with a camera
+        screen = pygame.display.set_mode(VIEW)
+        renderer = MapRenderer(load_tile, CELL, w, h, [gids])
+        camera = Camera(VIEW[0], VIEW[1], w * CELL, h * CELL)
+        state = {'x': 0}
+
+        def scroll():
+            state['x'] = (state['x'] + 7) % (w * CELL)
+            camera.follow(state['x'], h * CELL // 2)
+            renderer.draw(screen, camera.offset)
+
+        view = time_frames(scroll, args.frames)
+        full = (f'{old[0]:>10.3f} ms {old[1]:>8.3f} {new[0]:>8.3f} ms {new[1]:>8.3f}'
+                if old else f'{"-":>13} {"-":>8} {"-":>11} {"-":>8}')
+        print(f'{f"{w}x{h}":>10} {full} {view[0]:>6.3f} ms {view[1]:>8.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+# Memory over a long, spawn-heavy headless session: an enemy spawns every
+# tick up to --enemies alive, each vanishing after its visible duration,
+# so thousands are created and dropped. Prints RSS, live Enemy objects and
+# the enemy pool's counters every --every ticks.
+#
+#   python benchmarks/bench_memory.py [--ticks 36000] [--enemies 200] [--batched]
+#   python benchmarks/bench_memory.py --no-pool --tracemalloc
+#
+# The script fails if RSS grows more than --max-growth MB over the second
+# half of the run (the first half fills the bounded path and field-of-view
+# caches).
+import gc
+import os
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import headless
+
+DT = 1.0 / 60.0
+
+
+def rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except Exception:
+        # peak rather than current RSS (kB on Linux, bytes on macOS)
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def live_enemies(cls):
+    return sum(1 for o in gc.get_objects() if isinstance(o, cls))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--ticks', type=int, default=36000)
+    parser.add_argument('--enemies', type=int, default=200)
+    parser.add_argument('--every', type=int, default=3600)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--batched', action='store_true')
+    parser.add_argument('--no-pool', action='store_true', help='allocate every enemy (no reuse)')
+    parser.add_argument('--tracemalloc', action='store_true', help='also report traced Python allocations (slow)')
+    parser.add_argument('--max-growth', type=float, default=2.0)
+    args = parser.parse_args()
+
+    game = headless.load_game(args.seed)
+    game.set_batched_enemies(args.batched)
+    if args.no_pool:
+        game.enemy_pool.limit = 0
+    game.timestep.reset(DT)
+    game.do_action('start')
+    game.spawn_interval = DT
+    game.max_enemies = args.enemies
+    moves = random.Random(args.seed)
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    print(f'{"tick":>7} {"alive":>6} {"spawned":>8} {"reused":>8} {"objects":>8} {"RSS MB":>8}'
+          + (f' {"traced MB":>10}' if args.tracemalloc else ''))
+    samples = []
+    t0 = time.perf_counter()
+    for tick in range(1, args.ticks + 1):
+        if tick % 10 == 0:
+            game.do_action(moves.choice(('left', 'right', 'up', 'down')))
+        game.hero.hp = 10 ** 9
+        game.update(DT)
+        if game.state != 'playing':
+            game.do_action('start')
+        if tick % args.every == 0:
+            gc.collect()
+            pool = game.enemy_pool
+            rss = rss_mb()
+            samples.append((tick, rss))
+            line = (f'{tick:>7} {len(game.enemies):>6} {pool.created + pool.reused:>8} {pool.reused:>8} '
+                    f'{live_enemies(game.entities.Enemy):>8} {rss:>8.1f}')
+            if args.tracemalloc:
+                line += f' {tracemalloc.get_traced_memory()[0] / 2 ** 20:>10.2f}'
+            print(line)
+    elapsed = time.perf_counter() - t0
+    print(f'{args.ticks / elapsed:.0f} ticks/s')
+
+    warm = [rss for tick, rss in samples if tick >= args.ticks // 2]
+    if len(warm) >= 2:
+        growth = warm[-1] - warm[0]
+        print(f'RSS growth over the second half: {growth:+.1f} MB')
+        if growth > args.max_growth:
+            raise SystemExit(f'RSS grew {growth:.1f} MB (more than {args.max_growth} MB)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+# Saved games (game.savegame): save -> load -> continue must play out exactly
+# like the run that was never interrupted, plus the cost of capture/restore.
+#
+#   python benchmarks/bench_savegame.py [--ticks 900 1500] [--enemies 300]
+#
+# The headless game is driven with seeded arrow-key input. Two runs from the
+# same seed must end in the same state; then a game is saved, played on,
+# loaded and played on again with the same input, in the scalar and the
+# batched enemy update and across the two. The script fails on any mismatch.
+import os
+import sys
+import time
+import random
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import headless
+
+DT = 1.0 / 60.0
+MOVES = ('left', 'right', 'up', 'down')
+
+
+def begin(game, seed, batched):
+    game.set_batched_enemies(False)
+    for e in list(game.enemies):
+        game.untrack_entity(e)
+    game.enemies.clear()
+    game.ai.clear()
+    random.seed(seed)
+    game.reseed(seed)
+    game.set_batched_enemies(batched)
+    # the AI schedule and spawns run off the tick count
+    game.sim_tick = 0
+    game.enemy_spawn_timer = 0.0
+    game.timestep.reset(DT)
+    game.start_game()
+    game.spawn_interval = 0.5
+    game.max_enemies = 60
+
+
+def drive(game, ticks, seed):
+    # a random arrow key every 7 ticks; the hero can't die, and the game
+    # starts over after a victory
+    moves = random.Random(seed)
+    for tick in range(ticks):
+        if tick % 7 == 0:
+            game.do_action(moves.choice(MOVES))
+        game.hero.hp = 10 ** 6
+        game.update(DT)
+        if game.state != 'playing':
+            game.do_action('start')
+
+
+def state(game):
+    enemies = [(float(e.x), float(e.y), float(e.visible_timer), float(e.chase_remaining), e.path_index,
+                e.persistent) for e in game.enemies]
+    return (game.sim_tick, game.state, float(game.hero.x), float(game.hero.y), game.goal_cell,
+            enemies, game.rng.getstate(), len(game.level.nav.floor_cells),
+            bytes(game.level.fov.explored).count(1))
+
+
+def continued(game, seed, before, after, batched, switch=False):
+    # (state without the save, state after loading it); switch: load into
+    # the other enemy update
+    begin(game, seed, batched)
+    drive(game, before, seed)
+    data = game.savegame.capture()
+    drive(game, after, seed + 1)
+    a = state(game)
+    if switch:
+        game.set_batched_enemies(not batched)
+    game.savegame.restore(data)
+    drive(game, after, seed + 1)
+    return a, state(game)
+
+
+def timings(game, seed, count, runs, batched):
+    # median and best ms of capture() and restore() with `count` extra enemies
+    begin(game, seed, batched)
+    rng = random.Random(seed)
+    cells = game.level.nav.floor_cells
+    for k in range(count):
+        cx, cy = rng.choice(cells)
+        game.add_enemy(game.enemy_pool.acquire(cx, cy, 3, 3, persistent=(k % 3 == 0)))
+    drive(game, 60, seed)
+    data = game.savegame.capture()
+    result = {}
+    for name, f in (('capture', game.savegame.capture), ('restore', lambda: game.savegame.restore(data))):
+        times = []
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            f()
+            times.append((time.perf_counter() - t0) * 1000.0)
+        times.sort()
+        result[name] = (times[len(times) // 2], times[0])
+    return len(game.enemies), len(data), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--ticks', type=int, nargs=2, default=[900, 1500], help='ticks before and after the save')
+    parser.add_argument('--enemies', type=int, default=300, help='enemies added for the timings')
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    game = headless.load_game(args.seed)
+    before, after = args.ticks
+    failed = []
+    for batched in (False, True):
+        mode = 'batched' if batched else 'scalar'
+        begin(game, args.seed, batched)
+        drive(game, before + after, args.seed)
+        first = state(game)
+        begin(game, args.seed, batched)
+        drive(game, before + after, args.seed)
+        same = state(game) == first
+        print(f'{mode:8} same seed and input, same state: {same}')
+        if not same:
+            failed.append(f'{mode} run')
+        for switch in (False, True):
+            a, b = continued(game, args.seed, before, after, batched, switch)
+            label = f'{mode} -> {"scalar" if batched else "batched"}' if switch else mode
+            print(f'{label:8} {len(a[5]):3} enemies at the end, loaded game identical: {a == b}')
+            if a != b:
+                failed.append(f'{label} save')
+
+    for batched in (False, True):
+        count, size, result = timings(game, args.seed, args.enemies, args.runs, batched)
+        print(f'{"batched" if batched else "scalar"}, {count} enemies, {size} bytes:')
+        for name, (median, best) in result.items():
+            print(f'  {name:8} {median:8.3f} ms median {best:8.3f} ms best')
+    if failed:
+        raise SystemExit('saved games diverge: ' + ', '.join(failed))
+    print('saved games continue identically')
+
+
+if __name__ == '__main__':
+    main()
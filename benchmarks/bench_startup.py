@@ -0,0 +1,110 @@
+# Startup time of the launcher in fresh interpreters: time until the first
+# frame is on screen, until the menu is up and until every startup asset
+# (tiles, sprites, menu background, sounds) is loaded. Modes:
+#   eager   everything loaded before the first frame, one after the other,
+#           as main.py used to at import time
+#   serial  loading screen first, assets on a single worker thread
+#   pooled  loading screen first, assets on the worker pool (game.assets)
+#
+#   python benchmarks/bench_startup.py [--runs 5] [--modes eager pooled]
+#
+# "cold" runs delete the TMX binary cache first (the sounds are only
+# re-synthesized when their specs change).
+# Times are milliseconds from the start of the child process's script (the
+# interpreter's own startup is not included). Importing pygame dominates
+# "import" and varies from run to run, so "frame-import" (first frame minus
+# import) is the part the game itself controls.
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ('eager', 'serial', 'pooled')
+
+
+def child(mode):
+    t0 = time.perf_counter()
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    from types import ModuleType
+    import pgzero.runner
+    from pgzero.game import PGZeroGame
+
+    # what `pgzrun main.py` does, up to the first frames
+    path = os.path.join(ROOT, 'main.py')
+    mod = ModuleType('main')
+    mod.__file__ = path
+    sys.modules['main'] = mod
+    sys._pgzrun = True
+    pgzero.runner.prepare_mod(mod)
+    with open(path) as f:
+        exec(compile(f.read(), path, 'exec'), mod.__dict__)
+    PGZeroGame(mod).reinit_screen()
+    times = {'import': time.perf_counter() - t0}
+
+    from game import assets, audio, loop
+    if mode == 'eager':
+        loop.init()
+        audio.prepare()
+    mod.update(1 / 60)
+    mod.draw()
+    times['first_frame'] = time.perf_counter() - t0
+    while loop.state != 'menu' or (assets.started() and assets.manager.pump() > 0):
+        if loop.state == 'menu' and 'menu' not in times:
+            times['menu'] = time.perf_counter() - t0
+        # a frame's worth of idle time, as under vsync
+        time.sleep(0.001)
+        mod.update(1 / 60)
+        mod.draw()
+    times.setdefault('menu', time.perf_counter() - t0)
+    times['assets'] = time.perf_counter() - t0
+    print(json.dumps({k: v * 1000.0 for k, v in times.items()}))
+
+
+def clear_caches():
+    for path in glob.glob(os.path.join(ROOT, 'kenney_tiny-dungeon', '**', '*.tmx.cache'), recursive=True):
+        os.remove(path)
+
+
+def run(mode, cold):
+    if cold:
+        clear_caches()
+    env = dict(os.environ)
+    if mode == 'serial':
+        env['ASSET_WORKERS'] = '1'
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode],
+                         check=True, capture_output=True, text=True, env=env).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child)
+        return
+
+    print(f'{"run":<13} {"import":>8} {"1st frame":>10} {"frame-import":>13} {"menu":>8} {"assets":>8}   (median ms)')
+    for cold in (True, False):
+        for mode in args.modes:
+            if not cold:
+                run(mode, False)  # warm the caches
+            samples = [run(mode, cold) for _ in range(args.runs)]
+            for sample in samples:
+                sample['frame_import'] = sample['first_frame'] - sample['import']
+            row = {key: sorted(s[key] for s in samples)[len(samples) // 2] for key in samples[0]}
+            name = f'{mode} {"cold" if cold else "warm"}'
+            print(f'{name:<13} {row["import"]:>8.1f} {row["first_frame"]:>10.1f} {row["frame_import"]:>13.1f} '
+                  f'{row["menu"]:>8.1f} {row["assets"]:>8.1f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+# Load time of big TMX maps: the old ElementTree + CSV split loader, the
+# streaming engine.tmx parser for each layer encoding, and the binary cache.
+#
+#   python benchmarks/bench_tmxload.py [--size 1024] [--layers 3] [--runs 5]
+#
+# The maps are generated in a temporary folder (removed afterwards). Each
+# also has an object group whose cells and rectangles are checked after
+# parsing and after a cache load, and a truncated cache must be rebuilt.
+import os
+import sys
+import gzip
+import time
+import zlib
+import base64
+import random
+import shutil
+import argparse
+import tempfile
+import xml.etree.ElementTree as ET
+from array import array
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from engine.tmx import load_tmx, parse_tmx, cache_path
+
+FLAGS = (0, 0, 0, 0x80000000, 0x40000000)
+
+# <object> attributes (16x16 tiles) -> expected object_cell, object_rect
+OBJECTS = (
+    # point
+    ('class="hero" x="40" y="24"', (2, 1), (2, 1, 1, 1)),
+    # rectangle
+    ('class="territory" x="32" y="48" width="48" height="40"', (2, 3), (2, 3, 3, 3)),
+    # tile objects: y is the bottom edge
+    ('class="goal" gid="5" x="64" y="96" width="16" height="16"', (4, 5), (4, 5, 1, 1)),
+    ('class="enemy" gid="7" x="16" y="64" width="16" height="32"', (1, 3), (1, 2, 1, 2)),
+)
+
+
+def make_layer(rng, w, h):
+    return array('I', (rng.randint(1, 132) | rng.choice(FLAGS) for _ in range(w * h)))
+
+
+def encode(gids, w, encoding, compression):
+    if encoding == 'csv':
+        rows = (','.join(map(str, gids[y * w:(y + 1) * w])) for y in range(len(gids) // w))
+        return ',\n'.join(rows)
+    raw = array('I', gids)
+    if sys.byteorder == 'big':
+        raw.byteswap()
+    raw = raw.tobytes()
+    if compression == 'zlib':
+        raw = zlib.compress(raw)
+    elif compression == 'gzip':
+        raw = gzip.compress(raw)
+    return base64.b64encode(raw).decode('ascii')
+
+
+def write_tmx(path, layers, w, h, encoding, compression=None):
+    comp = f' compression="{compression}"' if compression else ''
+    with open(path, 'w') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write(f'<map version="1.8" orientation="orthogonal" width="{w}" height="{h}" '
+                f'tilewidth="16" tileheight="16" infinite="0">\n')
+        f.write(' <tileset firstgid="1" source="sampleSheet.tsx"/>\n')
+        for i, gids in enumerate(layers):
+            f.write(f' <layer id="{i + 1}" name="L{i}" width="{w}" height="{h}">\n')
+            f.write(f'  <data encoding="{encoding}"{comp}>\n{encode(gids, w, encoding, compression)}\n  </data>\n')
+            f.write(' </layer>\n')
+        f.write(' <objectgroup id="99" name="Objects">\n')
+        for i, (attrs, _, _) in enumerate(OBJECTS):
+            f.write(f'  <object id="{i + 1}" {attrs}/>\n')
+        f.write(' </objectgroup>\n')
+        f.write('</map>\n')
+
+
+def check_objects(tilemap, label):
+    for obj, (_, cell, rect) in zip(tilemap.objects, OBJECTS):
+        if tilemap.object_cell(obj) != cell or tilemap.object_rect(obj) != rect:
+            raise SystemExit(f'{label}: {obj.type} object at {tilemap.object_cell(obj)} '
+                             f'{tilemap.object_rect(obj)}, expected {cell} {rect}')
+
+
+def old_loader(path):
+    # what main.py did before engine.tmx
+    root = ET.parse(path).getroot()
+    out = {}
+    for lyr in root.findall('layer'):
+        data = lyr.find('data').text.strip()
+        out[lyr.get('name')] = [int(x) & 0x1FFFFFFF for x in data.replace('\n', '').split(',') if x != '']
+    return out
+
+
+def best_of(fn, runs):
+    best = None
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=1024)
+    parser.add_argument('--layers', type=int, default=3)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    w = h = args.size
+    layers = [make_layer(rng, w, h) for _ in range(args.layers)]
+    tmp = tempfile.mkdtemp(prefix='bench_tmx_')
+    try:
+        print(f'{args.layers} layers of {w}x{h}')
+        print(f'{"variant":>16} {"MB":>7} {"ms":>10}')
+        for encoding, compression in (('csv', None), ('base64', None), ('base64', 'zlib'), ('base64', 'gzip')):
+            path = os.path.join(tmp, f'{encoding}_{compression}.tmx')
+            write_tmx(path, layers, w, h, encoding, compression)
+            label = encoding + (f'+{compression}' if compression else '')
+            size = os.path.getsize(path) / 1e6
+            if encoding == 'csv':
+                ms = best_of(lambda: old_loader(path), args.runs)
+                print(f'{"old " + label:>16} {size:>7.1f} {ms:>10.1f}')
+            tilemap = parse_tmx(path)
+            if list(tilemap.layers['L0']) != list(layers[0]):
+                raise SystemExit(f'{label}: decoded layer differs')
+            check_objects(tilemap, label)
+            ms = best_of(lambda: parse_tmx(path), args.runs)
+            print(f'{label:>16} {size:>7.1f} {ms:>10.1f}')
+
+        load_tmx(path)
+        size = os.path.getsize(cache_path(path)) / 1e6
+        ms = best_of(lambda: load_tmx(path), args.runs)
+        cached = load_tmx(path)
+        if list(cached.layers['L0']) != list(layers[0]):
+            raise SystemExit('cached layer differs')
+        check_objects(cached, 'binary cache')
+        print(f'{"binary cache":>16} {size:>7.1f} {ms:>10.2f}')
+
+        # a cut-off cache (interrupted write, full disk) is parsed again
+        # and rewritten, not loaded short
+        full = os.path.getsize(cache_path(path))
+        for cut in (full // 2, 64):
+            os.truncate(cache_path(path), cut)
+            reloaded = load_tmx(path)
+            if list(reloaded.layers['L0']) != list(layers[0]):
+                raise SystemExit(f'cache cut to {cut} bytes: layer differs')
+            if os.path.getsize(cache_path(path)) != full:
+                raise SystemExit(f'cache cut to {cut} bytes: not rewritten')
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
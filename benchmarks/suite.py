@@ -0,0 +1,290 @@
+# Benchmark suite for the hot paths of the game, with a stored baseline.
+#
+#   python benchmarks/suite.py                      # run, compare to baseline.json
+#   python benchmarks/suite.py --json out.json      # also write the results
+#   python benchmarks/suite.py --save-baseline      # store the run as the baseline
+#   python benchmarks/suite.py --only update --margin 0.5
+#
+# Runs on the SDL dummy video/audio drivers. Each case is timed over
+# --repeat rounds and reported as milliseconds per operation; the exit status
+# is 1 when a case's median is slower than its baseline by more than
+# --margin (a fraction, 0.25 = 25%). Baselines are machine specific:
+# regenerate benchmarks/baseline.json on the machine that runs the check.
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import tempfile
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import headless
+
+BASELINE_PATH = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+DT = 1.0 / 60.0
+
+# rounds are made at least this long (seconds) by running more operations
+ROUND_TIME = 0.05
+
+CASES = []
+# folder for the files cases write, removed when the run ends (main())
+scratch = None
+
+
+def case(name, number=1):
+    # number: minimum operations per timed round
+    def register(fn):
+        CASES.append((name, number, fn))
+        return fn
+    return register
+
+
+def load():
+    import pygame
+    import pgzero.screen
+    game = headless.load_game()
+    surface = pygame.display.set_mode((game.WIDTH, game.HEIGHT))
+    game.screen = pgzero.screen.Screen(surface)
+    return game
+
+
+def populate(game, count, seed=1):
+    # `count` enemies on random floor cells, the hero made unkillable
+    for e in list(game.enemies):
+        game.untrack_entity(e)
+    game.enemies.clear()
+    game.ai.clear()
+    game.set_batched_enemies(False)
+    random.seed(seed)
+    game.reseed(seed)
+    game.start_game()
+    game.hero.hp = 10 ** 9
+    game.enemy_spawn_timer = 0.0
+    game.max_enemies = count
+    cells = game.level.nav.floor_cells or list(game.level.all_cells)
+    for k in range(count):
+        cx, cy = random.choice(cells)
+        game.add_enemy(game.entities.Enemy(cx, cy, 3, 3, persistent=(k % 3 == 0)))
+
+
+@case('draw_game.warm', number=20)
+def bench_draw_warm(game):
+    populate(game, 8)
+    game.draw_game()
+    return game.draw_game
+
+
+@case('draw_game.cold', number=5)
+def bench_draw_cold(game):
+    # map chunk cache dropped before every frame
+    populate(game, 8)
+
+    def op():
+        game.level.map_renderer.invalidate()
+        game.draw_game()
+    return op
+
+
+def bench_update(count):
+    def setup(game):
+        populate(game, count)
+
+        def op():
+            game.update(DT)
+            game.hero.hp = 10 ** 9
+            if game.state != 'playing':
+                game.state = 'playing'
+        return op
+    return setup
+
+
+case('update.enemies_8', number=100)(bench_update(8))
+case('update.enemies_100', number=20)(bench_update(100))
+case('update.enemies_1000', number=5)(bench_update(1000))
+
+
+@case('spawn.free_cell_scan', number=200)
+def bench_spawn_scan(game):
+    populate(game, 100)
+    cells = game.level.nav.floor_cells
+    return lambda: game.occupancy.random_free_cell(cells)
+
+
+@case('start_game.goal', number=50)
+def bench_start_game(game):
+    populate(game, 8)
+    return game.start_game
+
+
+@case('fov.cast', number=200)
+def bench_fov_cast(game):
+    # uncached shadowcast from the hero's start cell
+    populate(game, 8)
+    fov = game.level.fov
+    origin = game.hero.contact_cell
+    return lambda: fov._cast(origin, fov.radius)
+
+
+@case('effects.1000', number=50)
+def bench_effects(game):
+    # update and draw of a full particle system, particles living forever
+    populate(game, 8)
+    effects = game.effects
+    effects.clear()
+    for k in range(1000 // 25):
+        effects.emit(game.WIDTH / 2, game.HEIGHT / 2, 25, k % len(effects.styles), life=(1e9, 1e9))
+
+    def op():
+        effects.update(DT)
+        effects.draw(game.screen.surface)
+    return op
+
+
+@case('audio.synth_wav', number=5)
+def bench_synth_wav(game):
+    from engine.audio import synth_wav
+    path = os.path.join(scratch, 'tone.wav')
+    return lambda: synth_wav(path, 660.0, 0.5, 0.2)
+
+
+@case('tmx.parse', number=5)
+def bench_tmx_parse(game):
+    from engine.tmx import parse_tmx
+    return lambda: parse_tmx(game.level.TMX_PATH)
+
+
+@case('tmx.load_cached', number=50)
+def bench_tmx_cached(game):
+    from engine.tmx import load_tmx
+    load_tmx(game.level.TMX_PATH)
+    return lambda: load_tmx(game.level.TMX_PATH)
+
+
+@case('tiles.load_cold', number=3)
+def bench_tiles_cold(game):
+    # startup path: slice and scale the sheet, then look every tile up
+    from engine.atlas import TileAtlas
+    gids = range(1, 133)
+
+    def op():
+        game.level.tile_cache.clear()
+        if game.level.tileset_path is not None and os.path.exists(game.level.KENNEY_ATLAS_PATH):
+            game.level.tile_atlas = TileAtlas.from_tsx(game.level.tileset_path, game.level.tileset_firstgid,
+                                                       game.level.KENNEY_ATLAS_PATH, game.CELL)
+            game.level.tile_atlas.fill_cache(game.level.tile_cache)
+        for gid in gids:
+            game.level.load_tile_image_by_index(gid)
+    return op
+
+
+@case('tiles.load_warm', number=200)
+def bench_tiles_warm(game):
+    gids = range(1, 133)
+    load = game.level.load_tile_image_by_index
+
+    def op():
+        for gid in gids:
+            load(gid)
+    return op
+
+
+def measure(op, number, repeat):
+    # per-operation milliseconds of each round
+    t0 = time.perf_counter()
+    op()  # warm-up, also sizes the rounds
+    once = time.perf_counter() - t0
+    number = max(number, min(10000, int(ROUND_TIME / once) if once > 0 else 10000))
+    rounds = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            op()
+        rounds.append((time.perf_counter() - t0) * 1000.0 / number)
+    rounds.sort()
+    return {
+        'median_ms': rounds[len(rounds) // 2],
+        'min_ms': rounds[0],
+        'max_ms': rounds[-1],
+        'ops': number * repeat,
+    }
+
+
+def environment():
+    import pygame
+    return {
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'video_driver': os.environ.get('SDL_VIDEODRIVER'),
+    }
+
+
+def compare(results, baseline, margin):
+    # [(name, current, baseline, ratio)] of the regressed cases
+    regressions = []
+    for name, res in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        ratio = res['median_ms'] / base['median_ms'] if base['median_ms'] > 0 else 1.0
+        res['baseline_ms'] = base['median_ms']
+        res['ratio'] = ratio
+        if ratio > 1.0 + margin:
+            regressions.append((name, res['median_ms'], base['median_ms'], ratio))
+    return regressions
+
+
+def main():
+    global scratch
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--only', nargs='+', help='run the cases whose name contains one of these')
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--margin', type=float, default=0.25, help='allowed slowdown over the baseline')
+    parser.add_argument('--save-baseline', action='store_true', help='store this run as the baseline')
+    args = parser.parse_args()
+
+    os.environ.pop('PROFILE', None)
+    game = load()
+    results = {}
+    print(f'{"case":<24} {"median ms":>10} {"min":>9} {"baseline":>9} {"ratio":>6}')
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f).get('results', {})
+    with tempfile.TemporaryDirectory(prefix='bench_suite_') as scratch:
+        for name, number, setup in CASES:
+            if args.only and not any(part in name for part in args.only):
+                continue
+            res = results[name] = measure(setup(game), number, args.repeat)
+            compare({name: res}, baseline, args.margin)
+            base = f'{res["baseline_ms"]:>9.3f} {res["ratio"]:>6.2f}' if 'ratio' in res else f'{"-":>9} {"-":>6}'
+            print(f'{name:<24} {res["median_ms"]:>10.3f} {res["min_ms"]:>9.3f} {base}')
+
+    report = {'environment': environment(), 'margin': args.margin, 'results': results}
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'environment': report['environment'], 'results': results}, f, indent=2, sort_keys=True)
+        print(f'baseline written to {args.baseline}')
+        return 0
+
+    regressions = compare(results, baseline, args.margin)
+    for name, current, base, ratio in regressions:
+        print(f'REGRESSION {name}: {current:.3f} ms vs {base:.3f} ms baseline ({ratio:.2f}x)')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,3 @@
+# Reusable subsystems for the roguelike prototype. Modules here must not
+# depend on the pgzero runtime globals (screen, sounds, music) so they can be
+# used from main.py, benchmarks and headless runs alike.
@@ -0,0 +1,106 @@
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pygame
+
+
+def decode_image(path, size=None):
+    # worker side of an image: decode and scale, no display needed
+    img = pygame.image.load(path)
+    if size is not None and img.get_size() != tuple(size):
+        img = pygame.transform.scale(img, size)
+    return img
+
+
+def convert_image(img, alpha=True):
+    # main-thread side: pixel format of the display, when there is one
+    try:
+        return img.convert_alpha() if alpha else img.convert()
+    except pygame.error:
+        return img
+
+
+class AssetManager:
+    # Loads named assets on a pool of worker threads. An asset's load
+    # function runs on a worker (file decoding, scaling, sound synthesis;
+    # pygame and NumPy release the GIL for most of it) and its optional
+    # finish function runs on the main thread in pump(), for work that must
+    # stay there such as convert_alpha(). future(name) resolves to the
+    # finished value (or the load error), so a batch of assets takes about as
+    # long as its slowest member instead of the sum of all of them.
+    def __init__(self, workers=4):
+        self.workers = workers
+        self._pool = None
+        # name -> [worker future, finish, final future]
+        self._assets = {}
+        self._pending = []
+
+    def submit(self, name, load, *args, finish=None):
+        # schedule load(*args) unless name is already known; returns the
+        # final future
+        entry = self._assets.get(name)
+        if entry is not None:
+            return entry[2]
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='assets')
+        entry = [self._pool.submit(load, *args), finish, Future()]
+        self._assets[name] = entry
+        self._pending.append(name)
+        return entry[2]
+
+    def load_image(self, name, path, size=None, alpha=True):
+        return self.submit(name, decode_image, path, size, finish=lambda img: convert_image(img, alpha))
+
+    def _finish(self, name):
+        job, finish, future = self._assets[name]
+        try:
+            value = job.result()
+            if finish is not None:
+                value = finish(value)
+        except Exception as exc:
+            future.set_exception(exc)
+        else:
+            future.set_result(value)
+
+    def pump(self, budget=None):
+        # main thread, once per frame: finish the assets whose worker part is
+        # done, stopping after `budget` seconds; returns how many are left
+        start = time.perf_counter()
+        left = []
+        for i, name in enumerate(self._pending):
+            if budget is not None and time.perf_counter() - start > budget:
+                left.extend(self._pending[i:])
+                break
+            if self._assets[name][0].done():
+                self._finish(name)
+            else:
+                left.append(name)
+        self._pending = left
+        return len(left)
+
+    def future(self, name):
+        entry = self._assets.get(name)
+        return entry[2] if entry is not None else None
+
+    def __contains__(self, name):
+        return name in self._assets
+
+    def get(self, name, default=None):
+        # finished value without blocking; default while pending or on error
+        future = self.future(name)
+        if future is None or not future.done() or future.exception() is not None:
+            return default
+        return future.result()
+
+    def ready(self, names=None):
+        names = self._assets if names is None else names
+        return all(name in self._assets and self._assets[name][2].done() for name in names)
+
+    def progress(self):
+        # (finished, scheduled)
+        return len(self._assets) - len(self._pending), len(self._assets)
+
+    def shutdown(self, wait=True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=not wait)
+            self._pool = None
@@ -0,0 +1,84 @@
+import os
+import xml.etree.ElementTree as ET
+
+import pygame
+
+
+class TileAtlas:
+    # Tile provider backed by a single tilesheet image. The sheet is decoded
+    # and scaled once; tiles are handed out as subsurfaces keyed by gid.
+    def __init__(self, image, tilewidth, tileheight, columns, tilecount, firstgid=1, spacing=0, margin=0, cell=None):
+        self.tilewidth = tilewidth
+        self.tileheight = tileheight
+        self.columns = columns
+        self.tilecount = tilecount
+        self.firstgid = firstgid
+        self.rows = (tilecount + columns - 1) // columns
+        self.cell_w = cell or tilewidth
+        self.cell_h = cell or tileheight
+        if spacing or margin:
+            image = self._repack(image, spacing, margin)
+        size = (self.columns * self.cell_w, self.rows * self.cell_h)
+        if image.get_size() != size:
+            # one scale for the whole sheet instead of one per tile
+            image = pygame.transform.scale(image, size)
+        self.sheet = image
+        self._tiles = {}
+
+    def _repack(self, image, spacing, margin):
+        # copy the tiles next to each other so the sheet can be scaled as one
+        # image without the gaps bleeding into neighbouring tiles
+        tw, th = self.tilewidth, self.tileheight
+        packed = pygame.Surface((self.columns * tw, self.rows * th), pygame.SRCALPHA, image)
+        for i in range(self.tilecount):
+            col, row = i % self.columns, i // self.columns
+            src = (margin + col * (tw + spacing), margin + row * (th + spacing), tw, th)
+            packed.blit(image, (col * tw, row * th), src)
+        return packed
+
+    @classmethod
+    def from_tsx(cls, tsx_path, firstgid=1, image_path=None, cell=None, image=None):
+        # image_path overrides the image referenced by the tsx; a packed sheet
+        # (no spacing/margin) is expected in that case. image: that sheet
+        # already decoded (e.g. on a loader thread)
+        root = ET.parse(tsx_path).getroot()
+        tilewidth = int(root.get('tilewidth'))
+        tileheight = int(root.get('tileheight'))
+        columns = int(root.get('columns'))
+        tilecount = int(root.get('tilecount'))
+        spacing = int(root.get('spacing', 0))
+        margin = int(root.get('margin', 0))
+        if image_path is None:
+            source = root.find('image').get('source')
+            image_path = os.path.normpath(os.path.join(os.path.dirname(tsx_path), source))
+        else:
+            spacing = margin = 0
+        if image is None:
+            image = pygame.image.load(image_path)
+            try:
+                image = image.convert_alpha()
+            except pygame.error:
+                # no display mode set yet
+                pass
+        return cls(image, tilewidth, tileheight, columns, tilecount, firstgid, spacing, margin, cell)
+
+    def __contains__(self, gid):
+        return 0 <= gid - self.firstgid < self.tilecount
+
+    def get(self, gid):
+        if gid not in self:
+            return None
+        tile = self._tiles.get(gid)
+        if tile is None:
+            local = gid - self.firstgid
+            col, row = local % self.columns, local // self.columns
+            rect = (col * self.cell_w, row * self.cell_h, self.cell_w, self.cell_h)
+            tile = self.sheet.subsurface(rect)
+            self._tiles[gid] = tile
+        return tile
+
+    def fill_cache(self, cache):
+        # populate a gid -> surface dict with every tile of the sheet
+        for gid in range(self.firstgid, self.firstgid + self.tilecount):
+            cache[gid] = self.get(gid)
+        return cache
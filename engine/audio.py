@@ -0,0 +1,155 @@
+import os
+import sys
+import json
+import math
+import wave
+import random
+import hashlib
+from array import array
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+SAMPLE_RATE = 44100
+# bump when the synthesis changes in a way that should rebuild cached files
+SYNTH_VERSION = 1
+MANIFEST_NAME = '.synth.json'
+
+# pentatonic scale degrees (semitones above the root) used by music_loop
+PENTATONIC = (0, 2, 4, 7, 9)
+
+
+def envelope(n, attack=0.0, decay=0.0, sustain=1.0, release=0.0, sample_rate=SAMPLE_RATE):
+    # linear ADSR gain curve of n samples (times in seconds); None when flat
+    a = min(n, int(attack * sample_rate))
+    d = min(n - a, int(decay * sample_rate))
+    r = min(n - a - d, int(release * sample_rate))
+    s = n - a - d - r
+    if a == d == r == 0 and sustain == 1.0:
+        return None
+    if np is not None:
+        return np.concatenate((
+            np.linspace(0.0, 1.0, a, endpoint=False),
+            np.linspace(1.0, sustain, d, endpoint=False),
+            np.full(s, float(sustain)),
+            np.linspace(sustain, 0.0, r, endpoint=False),
+        ))
+    curve = [i / a for i in range(a)]
+    curve += [1.0 + (sustain - 1.0) * i / d for i in range(d)]
+    curve += [float(sustain)] * s
+    curve += [sustain - sustain * i / r for i in range(r)]
+    return curve
+
+
+def tone(freq, duration, volume=0.2, harmonics=((1.0, 1.0),), env=None, sample_rate=SAMPLE_RATE):
+    # float samples, volume 1.0 being 16 bit full scale; harmonics are (frequency multiple,
+    # relative amplitude) pairs mixed together. The single-harmonic case
+    # keeps the exact arithmetic of the original per-sample synth loop.
+    n = int(sample_rate * duration)
+    total = sum(amp for _, amp in harmonics)
+    if np is not None:
+        t = np.arange(n) / sample_rate
+        if len(harmonics) == 1 and harmonics[0][1] == 1.0:
+            wave_ = np.sin(2.0 * np.pi * (freq * harmonics[0][0]) * t)
+        else:
+            wave_ = sum(amp * np.sin(2.0 * np.pi * (freq * mult) * t) for mult, amp in harmonics) / total
+        out = volume * 32767.0 * wave_
+        if env is not None:
+            out *= env
+        return out
+    out = []
+    for i in range(n):
+        t = i / sample_rate
+        if len(harmonics) == 1 and harmonics[0][1] == 1.0:
+            v = math.sin(2.0 * math.pi * (freq * harmonics[0][0]) * t)
+        else:
+            v = sum(amp * math.sin(2.0 * math.pi * (freq * mult) * t) for mult, amp in harmonics) / total
+        v = volume * 32767.0 * v
+        if env is not None:
+            v *= env[i]
+        out.append(v)
+    return out
+
+
+def to_pcm16(samples):
+    # truncate toward zero like int() and clip into the 16 bit range
+    if np is not None:
+        return np.clip(np.asarray(samples), -32768, 32767).astype('<i2').tobytes()
+    pcm = array('h', (max(-32768, min(32767, int(v))) for v in samples))
+    if sys.byteorder == 'big':
+        pcm.byteswap()
+    return pcm.tobytes()
+
+
+def write_wav(path, samples, sample_rate=SAMPLE_RATE):
+    with wave.open(path, 'w') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(to_pcm16(samples))
+
+
+def synth_wav(path, freq=440.0, duration=0.5, volume=0.2):
+    write_wav(path, tone(freq, duration, volume))
+
+
+def music_loop(seed, bars=4, bpm=120, root=220.0, volume=0.08, sample_rate=SAMPLE_RATE):
+    # seeded procedural loop: one pentatonic note per beat with a soft
+    # attack/release so the loop boundary does not click
+    rng = random.Random(seed)
+    beat = 60.0 / bpm
+    notes = []
+    degree = 0
+    for _ in range(bars * 4):
+        degree = max(0, min(len(PENTATONIC) * 2 - 1, degree + rng.choice((-2, -1, 1, 2))))
+        octave, step = divmod(degree, len(PENTATONIC))
+        notes.append(root * 2 ** octave * 2 ** (PENTATONIC[step] / 12.0))
+    n = int(sample_rate * beat)
+    env = envelope(n, attack=0.01, decay=0.1, sustain=0.6, release=0.15, sample_rate=sample_rate)
+    harmonics = ((1.0, 1.0), (2.0, 0.3))
+    parts = [tone(f, beat, volume, harmonics, env, sample_rate) for f in notes]
+    if np is not None:
+        return np.concatenate(parts)
+    return [v for part in parts for v in part]
+
+
+def render(spec):
+    kind = spec['kind']
+    if kind == 'tone':
+        n = int(SAMPLE_RATE * spec['duration'])
+        env = envelope(n, *spec.get('envelope', ()))
+        return tone(spec['freq'], spec['duration'], spec['volume'],
+                    tuple(map(tuple, spec.get('harmonics', ((1.0, 1.0),)))), env)
+    if kind == 'loop':
+        return music_loop(spec['seed'], spec.get('bars', 4), spec.get('bpm', 120),
+                          spec.get('root', 220.0), spec.get('volume', 0.08))
+    raise ValueError(f'unknown sound kind {kind!r}')
+
+
+def spec_hash(spec):
+    blob = json.dumps([SYNTH_VERSION, spec], sort_keys=True).encode('utf-8')
+    return hashlib.sha1(blob).hexdigest()
+
+
+def ensure_wav(path, spec):
+    # (re)build path from spec unless the manifest next to it says the file
+    # was already generated from identical parameters; returns True if built
+    folder = os.path.dirname(path) or '.'
+    manifest_path = os.path.join(folder, MANIFEST_NAME)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    name = os.path.basename(path)
+    digest = spec_hash(spec)
+    if manifest.get(name) == digest and os.path.exists(path):
+        return False
+    write_wav(path, render(spec))
+    manifest[name] = digest
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+        f.write('\n')
+    return True
@@ -0,0 +1,42 @@
+class Camera:
+    # Fixed-size viewport over a world measured in pixels. follow() centers
+    # it on a point and clamps it to the world; maps smaller than the view
+    # are centered instead. x/y is the world pixel drawn at the screen's
+    # top-left corner.
+    def __init__(self, view_w, view_h, world_w, world_h):
+        self.view_w = view_w
+        self.view_h = view_h
+        self.world_w = world_w
+        self.world_h = world_h
+        self.x = 0
+        self.y = 0
+
+    def _clamp(self, pos, view, world):
+        if world <= view:
+            return (world - view) // 2
+        return max(0, min(world - view, pos))
+
+    def follow(self, px, py):
+        self.x = self._clamp(int(px) - self.view_w // 2, self.view_w, self.world_w)
+        self.y = self._clamp(int(py) - self.view_h // 2, self.view_h, self.world_h)
+
+    @property
+    def offset(self):
+        return self.x, self.y
+
+    def bounds(self, margin=0):
+        # world-pixel rectangle (x0, y0, x1, y1) covered by the view
+        return (self.x - margin, self.y - margin,
+                self.x + self.view_w + margin, self.y + self.view_h + margin)
+
+    def is_visible(self, wx, wy, w, h, margin=0):
+        return (wx + w > self.x - margin and wx < self.x + self.view_w + margin
+                and wy + h > self.y - margin and wy < self.y + self.view_h + margin)
+
+    def visible_cells(self, cell, grid_w, grid_h, margin=0):
+        # inclusive-exclusive cell range (x0, y0, x1, y1) on screen
+        x0 = max(0, (self.x - margin) // cell)
+        y0 = max(0, (self.y - margin) // cell)
+        x1 = min(grid_w, (self.x + self.view_w + margin) // cell + 1)
+        y1 = min(grid_h, (self.y + self.view_h + margin) // cell + 1)
+        return x0, y0, x1, y1
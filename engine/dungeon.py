@@ -0,0 +1,164 @@
+import random
+from array import array
+
+# default gids, matching the kenney tiny-dungeon sheet used by the TMX map
+ROOM_GID = 49  # tile_0048
+CORRIDOR_GID = 43  # tile_0042
+WALL_GID = 41  # tile_0040
+VOID_GID = 1  # tile_0000
+
+
+class Dungeon:
+    # Seeded rooms-and-corridors level generated lazily, one chunk of
+    # chunk x chunk cells at a time. Every chunk is a small BSP dungeon built
+    # from its own RNG (seed and chunk coordinates), and the corridor leaving
+    # it through each shared edge uses a door position derived from the
+    # edge, so neighbouring chunks line up whatever order they are generated
+    # in. Tiles go into gids, a flat row-major array in the map_data layout
+    # (0 while a chunk hasn't been generated).
+    def __init__(self, seed, width, height, chunk=32, min_leaf=8, min_room=4,
+                 room_gid=ROOM_GID, corridor_gid=CORRIDOR_GID, wall_gid=WALL_GID, void_gid=VOID_GID):
+        self.seed = seed
+        self.width = width
+        self.height = height
+        self.chunk = chunk
+        self.min_leaf = min_leaf
+        self.min_room = min_room
+        self.room_gid = room_gid
+        self.corridor_gid = corridor_gid
+        self.wall_gid = wall_gid
+        self.void_gid = void_gid
+        self.chunks_x = (width + chunk - 1) // chunk
+        self.chunks_y = (height + chunk - 1) // chunk
+        self.gids = array('H', [0]) * (width * height)
+        # (cx, cy) -> [(x, y, w, h), ...] rooms of each generated chunk
+        self.rooms = {}
+
+    @property
+    def floor_gids(self):
+        return {self.room_gid, self.corridor_gid}
+
+    def chunk_rect(self, cx, cy):
+        x, y = cx * self.chunk, cy * self.chunk
+        return (x, y, min(self.chunk, self.width - x), min(self.chunk, self.height - y))
+
+    def is_generated(self, cx, cy):
+        return (cx, cy) in self.rooms
+
+    def _door(self, kind, x, y, span):
+        # door offset along a chunk edge, shared by the chunks on both sides
+        rng = random.Random(f'{self.seed}:{kind}:{x}:{y}')
+        return rng.randint(1, span - 2) if span > 2 else 0
+
+    def _fill(self, x, y, w, h, gid):
+        gids = self.gids
+        row = array('H', [gid]) * w
+        for yy in range(y, y + h):
+            i = yy * self.width + x
+            gids[i:i + w] = row
+
+    def _split(self, rng, rect, leaves):
+        x, y, w, h = rect
+        can_x = w >= 2 * self.min_leaf
+        can_y = h >= 2 * self.min_leaf
+        if not (can_x or can_y):
+            leaves.append(rect)
+            return
+        if can_x and (not can_y or w > h or (w == h and rng.random() < 0.5)):
+            cut = rng.randint(self.min_leaf, w - self.min_leaf)
+            self._split(rng, (x, y, cut, h), leaves)
+            self._split(rng, (x + cut, y, w - cut, h), leaves)
+        else:
+            cut = rng.randint(self.min_leaf, h - self.min_leaf)
+            self._split(rng, (x, y, w, cut), leaves)
+            self._split(rng, (x, y + cut, w, h - cut), leaves)
+
+    def _room(self, rng, leaf):
+        # room inside a leaf, keeping one cell of wall on every side
+        x, y, w, h = leaf
+        rw = rng.randint(min(self.min_room, w - 2), w - 2) if w > 2 else 1
+        rh = rng.randint(min(self.min_room, h - 2), h - 2) if h > 2 else 1
+        rx = x + rng.randint(1, max(1, w - rw - 1)) if w > 2 else x
+        ry = y + rng.randint(1, max(1, h - rh - 1)) if h > 2 else y
+        return (rx, ry, rw, rh)
+
+    def _corridor(self, rng, a, b, out):
+        # L-shaped corridor between two cells, as two 1-wide rectangles
+        (ax, ay), (bx, by) = a, b
+        if rng.random() < 0.5:
+            out.append((min(ax, bx), ay, abs(ax - bx) + 1, 1))
+            out.append((bx, min(ay, by), 1, abs(ay - by) + 1))
+        else:
+            out.append((ax, min(ay, by), 1, abs(ay - by) + 1))
+            out.append((min(ax, bx), by, abs(ax - bx) + 1, 1))
+
+    def generate_chunk(self, cx, cy):
+        # returns the chunk's cell rect, or None if it was already generated
+        if (cx, cy) in self.rooms or not (0 <= cx < self.chunks_x and 0 <= cy < self.chunks_y):
+            return None
+        rng = random.Random(f'{self.seed}:{cx}:{cy}')
+        rect = self.chunk_rect(cx, cy)
+        x0, y0, w, h = rect
+        leaves = []
+        self._split(rng, rect, leaves)
+        rooms = [self._room(rng, leaf) for leaf in leaves]
+        centers = [(rx + rw // 2, ry + rh // 2) for rx, ry, rw, rh in rooms]
+
+        # chain the rooms in BSP order, so siblings are connected first
+        corridors = []
+        for a, b in zip(centers, centers[1:]):
+            self._corridor(rng, a, b, corridors)
+
+        # doors on the edges shared with other chunks, joined to the nearest room
+        doors = []
+        if cx > 0:
+            doors.append((x0, y0 + self._door('v', x0, y0, h)))
+        if cx < self.chunks_x - 1:
+            doors.append((x0 + w - 1, y0 + self._door('v', x0 + w, y0, h)))
+        if cy > 0:
+            doors.append((x0 + self._door('h', x0, y0, w), y0))
+        if cy < self.chunks_y - 1:
+            doors.append((x0 + self._door('h', x0, y0 + h, w), y0 + h - 1))
+        for door in doors:
+            near = min(centers, key=lambda c: abs(c[0] - door[0]) + abs(c[1] - door[1]))
+            self._corridor(rng, door, near, corridors)
+
+        # walls around every floor rectangle (clipped to the chunk), then the
+        # floors on top: corridors first so rooms keep their own tile
+        self._fill(x0, y0, w, h, self.void_gid)
+        for fx, fy, fw, fh in corridors + rooms:
+            wx0, wy0 = max(x0, fx - 1), max(y0, fy - 1)
+            wx1, wy1 = min(x0 + w, fx + fw + 1), min(y0 + h, fy + fh + 1)
+            self._fill(wx0, wy0, wx1 - wx0, wy1 - wy0, self.wall_gid)
+        for fx, fy, fw, fh in corridors:
+            self._fill(fx, fy, fw, fh, self.corridor_gid)
+        for fx, fy, fw, fh in rooms:
+            self._fill(fx, fy, fw, fh, self.room_gid)
+        self.rooms[(cx, cy)] = rooms
+        return rect
+
+    def ensure(self, x0, y0, x1, y1):
+        # generate the chunks overlapping cells [x0, x1) x [y0, y1); returns
+        # the rects of the chunks generated by this call
+        c = self.chunk
+        new = []
+        for cy in range(max(0, y0 // c), min(self.chunks_y, (y1 - 1) // c + 1)):
+            for cx in range(max(0, x0 // c), min(self.chunks_x, (x1 - 1) // c + 1)):
+                rect = self.generate_chunk(cx, cy)
+                if rect is not None:
+                    new.append(rect)
+        return new
+
+    def generate_all(self):
+        return self.ensure(0, 0, self.width, self.height)
+
+    def start_chunk(self):
+        return (self.chunks_x // 2, self.chunks_y // 2)
+
+    def start_cell(self):
+        # centre of the first room of start_chunk(), once it is generated
+        rooms = self.rooms.get(self.start_chunk())
+        if not rooms:
+            return None
+        rx, ry, rw, rh = rooms[0]
+        return (rx + rw // 2, ry + rh // 2)
@@ -0,0 +1,281 @@
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+# per-entity state kept in the store, with the NumPy dtype of each column
+FIELDS = (
+    ('x', 'f8'),
+    ('y', 'f8'),
+    ('prev_x', 'f8'),
+    ('prev_y', 'f8'),
+    ('target_x', 'f8'),
+    ('target_y', 'f8'),
+    ('speed', 'f8'),
+    ('frame_timer', 'f8'),
+    ('frame_index', 'i8'),
+    ('visible_timer', 'f8'),
+    ('visible_duration', 'f8'),
+    ('chase_remaining', 'f8'),
+    ('persistent', '?'),
+    ('dead', '?'),
+)
+FIELD_NAMES = tuple(name for name, _ in FIELDS)
+
+
+class StoreField:
+    # Data descriptor installed on the view classes: reads and writes go to
+    # the owning store's column at the entity's slot.
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, obj, owner):
+        if obj is None:
+            return self
+        return obj._store.columns[self.name].item(obj._slot)
+
+    def __set__(self, obj, value):
+        obj._store.columns[self.name][obj._slot] = value
+
+
+_views = {}
+
+
+def view_class(cls):
+    # subclass of cls whose FIELDS live in a store; it keeps the class name so
+    # code that dispatches on type(entity).__name__ is unaffected, and adds
+    # no slots so __class__ can be swapped both ways. cls has to provide
+    # _store and _slot attributes (a __dict__ or slots).
+    view = _views.get(cls)
+    if view is None:
+        attrs = {name: StoreField(name) for name in FIELD_NAMES}
+        attrs['__slots__'] = ()
+        attrs['__qualname__'] = cls.__qualname__
+        attrs['__module__'] = cls.__module__
+        view = type(cls.__name__, (cls,), attrs)
+        view._plain_class = cls
+        _views[cls] = view
+    return view
+
+
+class EntityStore:
+    # Structure-of-arrays storage for animated entities. Entities added here
+    # become thin views (their class is swapped for view_class(cls)) and
+    # step() advances movement, animation and the visibility / chase timers
+    # of all of them with a handful of array operations. Slots follow the
+    # order of `entities`, so per-entity callbacks run in list order.
+    def __init__(self, capacity=64):
+        if np is None:
+            raise RuntimeError('EntityStore needs NumPy')
+        self.n = 0
+        self.entities = []
+        self.columns = {name: np.zeros(capacity, dtype) for name, dtype in FIELDS}
+        self.n_idle = np.zeros(capacity, 'i8')
+        self.n_move = np.zeros(capacity, 'i8')
+
+    def __len__(self):
+        return self.n
+
+    def _grow(self):
+        capacity = max(64, 2 * len(self.n_idle))
+        for name, column in self.columns.items():
+            grown = np.zeros(capacity, column.dtype)
+            grown[:self.n] = column[:self.n]
+            self.columns[name] = grown
+        for attr in ('n_idle', 'n_move'):
+            grown = np.zeros(capacity, 'i8')
+            grown[:self.n] = getattr(self, attr)[:self.n]
+            setattr(self, attr, grown)
+
+    def add(self, entity):
+        if self.n == len(self.n_idle):
+            self._grow()
+        slot = self.n
+        self.n += 1
+        for name in FIELD_NAMES:
+            self.columns[name][slot] = getattr(entity, name, 0)
+        self.n_idle[slot] = len(entity.idle_frames)
+        self.n_move[slot] = len(entity.move_frames)
+        entity._store = self
+        entity._slot = slot
+        entity.__class__ = view_class(entity.__class__)
+        self.entities.append(entity)
+        return slot
+
+    def extend(self, entities, values=None):
+        # add() for many entities, filling each column in one assignment.
+        # values: {field: one value per entity} for fields the entities
+        # don't hold themselves (e.g. just decoded from a saved game)
+        n = self.n
+        m = n + len(entities)
+        while m > len(self.n_idle):
+            self._grow()
+        for name in FIELD_NAMES:
+            if values is not None and name in values:
+                self.columns[name][n:m] = values[name]
+            else:
+                self.columns[name][n:m] = [getattr(entity, name, 0) for entity in entities]
+        self.n_idle[n:m] = [len(entity.idle_frames) for entity in entities]
+        self.n_move[n:m] = [len(entity.move_frames) for entity in entities]
+        plain = view = None
+        for slot, entity in enumerate(entities, n):
+            entity._store = self
+            entity._slot = slot
+            if entity.__class__ is not plain:
+                plain = entity.__class__
+                view = view_class(plain)
+            entity.__class__ = view
+        self.entities.extend(entities)
+        self.n = m
+
+    def _detach(self, entity):
+        # back to a plain entity holding its own fields
+        slot = entity._slot
+        values = [self.columns[name].item(slot) for name in FIELD_NAMES]
+        entity.__class__ = entity._plain_class
+        for name, value in zip(FIELD_NAMES, values):
+            setattr(entity, name, value)
+        entity._store = None
+        entity._slot = None
+
+    def clear(self, detach=True):
+        # detach=False skips copying the fields back: the entities are left
+        # without them, for callers that set them all again (loading a game)
+        for entity in self.entities:
+            if detach:
+                self._detach(entity)
+            else:
+                entity.__class__ = entity._plain_class
+                entity._store = None
+                entity._slot = None
+        self.entities.clear()
+        self.n = 0
+
+    def compact(self):
+        # drop entities flagged dead by swap-remove, the same moves as
+        # engine.pool.swap_remove on the entity list: the holes left below
+        # the new size are filled, in order, from the live entities above
+        # it. Returns the removed entities.
+        n = self.n
+        dead = self.columns['dead'][:n]
+        if not dead.any():
+            return []
+        dead_slots = np.flatnonzero(dead)
+        m = n - len(dead_slots)
+        removed = [self.entities[i] for i in dead_slots.tolist()]
+        for entity in removed:
+            self._detach(entity)
+        holes = dead_slots[dead_slots < m]
+        movers = np.flatnonzero(~dead[m:]) + m
+        for column in self.columns.values():
+            column[holes] = column[movers]
+        self.n_idle[holes] = self.n_idle[movers]
+        self.n_move[holes] = self.n_move[movers]
+        ents = self.entities
+        for hole, mover in zip(holes.tolist(), movers.tolist()):
+            entity = ents[mover]
+            entity._slot = hole
+            ents[hole] = entity
+        del ents[m:]
+        self.n = m
+        return removed
+
+    def reorder(self):
+        # re-sort the columns after `entities` was reordered in place
+        # (e.g. random.shuffle); the list goes back to slot order first as
+        # _permute moves entities and columns together
+        order = np.array([e._slot for e in self.entities], dtype='i8')
+        self.entities.sort(key=lambda e: e._slot)
+        self._permute(order)
+
+    def _permute(self, order):
+        m = len(order)
+        for column in self.columns.values():
+            column[:m] = column[order]
+        self.n_idle[:m] = self.n_idle[order]
+        self.n_move[:m] = self.n_move[order]
+        self.entities[:] = [self.entities[i] for i in order]
+        for slot, entity in enumerate(self.entities):
+            entity._slot = slot
+        self.n = m
+
+    def moving(self):
+        c = self.columns
+        n = self.n
+        return (c['x'][:n] != c['target_x'][:n]) | (c['y'][:n] != c['target_y'][:n])
+
+    def save_pos(self):
+        # previous-step positions for interpolated drawing
+        c = self.columns
+        n = self.n
+        c['prev_x'][:n] = c['x'][:n]
+        c['prev_y'][:n] = c['y'][:n]
+
+    def cells(self, cell):
+        # grid cell each entity is drawn in, as int(x) // cell per entity
+        c = self.columns
+        n = self.n
+        return c['x'][:n].astype('i8') // cell, c['y'][:n].astype('i8') // cell
+
+    def cell_distances(self, cell, x, y):
+        # Chebyshev distance in cells from cell (x, y) to each entity's
+        # cell, as a list indexed by slot
+        cx, cy = self.cells(cell)
+        return np.maximum(np.abs(cx - x), np.abs(cy - y)).tolist()
+
+    def step(self, dt, chase_speed, frame_rate, anim_bounds=None):
+        # same arithmetic, in the same order, as the scalar Enemy.update so
+        # both paths produce identical floats. Only entities whose position
+        # lies inside anim_bounds (x0, y0, x1, y1) animate. Returns the mask
+        # of entities that moved.
+        n = self.n
+        c = self.columns
+        x, y = c['x'][:n], c['y'][:n]
+        tx, ty = c['target_x'][:n], c['target_y'][:n]
+        transient = ~c['persistent'][:n]
+
+        # visibility and chase timers
+        vt = c['visible_timer'][:n]
+        np.add(vt, dt, out=vt, where=transient)
+        chasing = transient & (c['chase_remaining'][:n] > 0)
+        cr = c['chase_remaining'][:n]
+        np.subtract(cr, dt, out=cr, where=chasing)
+
+        # movement towards the target cell
+        speed = c['speed'][:n]
+        speed = np.where(chasing, np.maximum(speed, chase_speed), speed)
+        dx = tx - x
+        dy = ty - y
+        dist = np.sqrt(dx * dx + dy * dy)
+        moved = dist > 1e-3
+        step = speed * dt
+        arrive = moved & (step >= dist)
+        glide = moved & ~arrive
+        with np.errstate(divide='ignore', invalid='ignore'):
+            nx = x + dx / dist * step
+            ny = y + dy / dist * step
+        x[glide] = nx[glide]
+        y[glide] = ny[glide]
+        x[arrive] = tx[arrive]
+        y[arrive] = ty[arrive]
+
+        # animation frame advance
+        ft = c['frame_timer'][:n]
+        if anim_bounds is None:
+            near = np.ones(n, '?')
+        else:
+            x0, y0, x1, y1 = anim_bounds
+            near = (x >= x0) & (x < x1) & (y >= y0) & (y < y1)
+        np.add(ft, dt, out=ft, where=near)
+        tick = near & (ft >= 1.0 / frame_rate)
+        if tick.any():
+            moving = (x != tx) | (y != ty)
+            frames = np.maximum(np.where(moving, self.n_move[:n], self.n_idle[:n]), 1)
+            fi = c['frame_index'][:n]
+            ft[tick] = 0.0
+            fi[tick] = (fi[tick] + 1) % frames[tick]
+
+        # transient entities disappear after their visible duration
+        dead = c['dead'][:n]
+        dead |= transient & (vt >= c['visible_duration'][:n])
+        return moved
@@ -0,0 +1,111 @@
+from collections import OrderedDict
+
+from engine.navgrid import WALKABLE
+
+# (col -> x, row -> x, col -> y, row -> y) for the north, south, east and
+# west quadrants scanned around the origin
+QUADRANTS = ((1, 0, 0, -1), (1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0))
+
+
+class FieldOfView:
+    # Cells visible from an origin over a NavGrid, by symmetric shadowcasting
+    # (Albert Ford's variant: a floor cell is visible from A exactly when A
+    # is visible from it). Cells that aren't walkable block sight and are
+    # themselves visible. Slopes are kept as integer fractions so the result
+    # doesn't depend on float rounding. update() only recomputes when the
+    # origin moves to another cell, results are cached per (cell, radius)
+    # (LRU) so walking back costs nothing, and the cache is dropped when the
+    # grid's walkability changes. Every cell ever seen is flagged in
+    # `explored`.
+    def __init__(self, nav, radius=8, cache_size=256):
+        self.nav = nav
+        self.radius = radius
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self._version = nav.version
+        self.origin = None
+        # cell indices (y * width + x) seen from the current origin
+        self.visible = frozenset()
+        self.explored = bytearray(nav.width * nav.height)
+        self.hits = 0
+        self.misses = 0
+
+    def update(self, origin):
+        # True when the visible set was recomputed
+        if origin == self.origin and self._version == self.nav.version:
+            return False
+        self.origin = origin
+        self.visible = self.compute(origin)
+        explored = self.explored
+        for i in self.visible:
+            explored[i] = 1
+        return True
+
+    def forget(self):
+        # nothing explored (new game); the next update() recomputes
+        self.explored = bytearray(len(self.explored))
+        self.origin = None
+
+    def compute(self, origin, radius=None):
+        if radius is None:
+            radius = self.radius
+        version = self.nav.version
+        if version != self._version:
+            self.cache.clear()
+            self._version = version
+        key = (origin, radius)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return self.cache[key]
+        self.misses += 1
+        visible = frozenset(self._cast(origin, radius))
+        self.cache[key] = visible
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return visible
+
+    def is_visible(self, x, y):
+        return y * self.nav.width + x in self.visible
+
+    def _cast(self, origin, radius):
+        nav = self.nav
+        w, h = nav.width, nav.height
+        flags = nav.flags
+        ox, oy = origin
+        visible = set()
+        if not (0 <= ox < w and 0 <= oy < h):
+            return visible
+        visible.add(oy * w + ox)
+        r2 = radius * radius + radius
+        for cx, rx, cy, ry in QUADRANTS:
+            # rows still to scan: (depth, start slope, end slope), a slope
+            # being the fraction num / den with den > 0
+            rows = [(1, -1, 1, 1, 1)]
+            while rows:
+                depth, sn, sd, en, ed = rows.pop()
+                if depth > radius:
+                    continue
+                # columns whose centre is inside the sector, rounding ties
+                # towards the middle of the row
+                lo = (2 * depth * sn + sd) // (2 * sd)
+                hi = -((ed - 2 * depth * en) // (2 * ed))
+                prev = None
+                for col in range(lo, hi + 1):
+                    x = ox + col * cx + depth * rx
+                    y = oy + col * cy + depth * ry
+                    inside = 0 <= x < w and 0 <= y < h
+                    wall = not inside or not flags[y * w + x] & WALKABLE
+                    # floor only counts when its centre is in the sector
+                    # (this is what makes the result symmetric)
+                    if inside and col * col + depth * depth <= r2 and (
+                            wall or (col * sd >= depth * sn and col * ed <= depth * en)):
+                        visible.add(y * w + x)
+                    if prev is True and not wall:
+                        sn, sd = 2 * col - 1, 2 * depth
+                    elif prev is False and wall:
+                        rows.append((depth + 1, sn, sd, 2 * col - 1, 2 * depth))
+                    prev = wall
+                if prev is False:
+                    rows.append((depth + 1, sn, sd, en, ed))
+        return visible
@@ -0,0 +1,211 @@
+from collections import OrderedDict
+
+import pygame
+
+# color of the outline drawn for cells without a tile
+GRID_COLOR = (70, 70, 70)
+BACKGROUND_COLOR = (0, 0, 0)
+TRANSPARENT = (0, 0, 0, 0)
+
+# TMX flip/rotation bits (see engine.tmx)
+FLIP_H = 0x80000000
+FLIP_V = 0x40000000
+FLIP_D = 0x20000000
+GID_MASK = 0x1FFFFFFF
+
+
+def orient(img, gid):
+    # apply the TMX flags of gid to a tile: the diagonal flip (transpose)
+    # first, then the horizontal and vertical flips
+    if gid & FLIP_D:
+        img = pygame.transform.flip(pygame.transform.rotate(img, -90), True, False)
+    if gid & (FLIP_H | FLIP_V):
+        img = pygame.transform.flip(img, bool(gid & FLIP_H), bool(gid & FLIP_V))
+    return img
+
+
+class MapRenderer:
+    # Renders the static TMX layers from cached chunks of chunk x chunk
+    # cells, one surface per layer: the first layer is opaque (with the grid
+    # outline of cells no layer covers), the others are transparent and only
+    # allocated where they have tiles. A frame costs one blit per chunk and
+    # visible layer on screen instead of one per cell, and only chunks near
+    # the view are kept (LRU), so the cost and memory follow the window size
+    # rather than the map size. Flipped/rotated tiles are oriented once and
+    # reused. The cache is dropped when the layers or the cell size change,
+    # and cells changed through set_tile() are patched on the next draw.
+    def __init__(self, tile_loader, cell, grid_w, grid_h, layers=(), chunk=8, max_chunks=48, visible=None):
+        # tile_loader(gid without flip bits) -> surface or None
+        self.tile_loader = tile_loader
+        self.cell = cell
+        self.grid_w = grid_w
+        self.grid_h = grid_h
+        self.layers = list(layers)
+        self.visible = list(visible) if visible is not None else [True] * len(self.layers)
+        self.chunk = chunk
+        self.max_chunks = max_chunks
+        # (cx, cy) -> [surface or None per layer]
+        self.chunks = OrderedDict()
+        self._tiles = {}
+        self._key = None
+        self._dirty = set()
+
+    def _cache_key(self):
+        return (self.cell, self.grid_w, self.grid_h, self.chunk, tuple(id(layer) for layer in self.layers))
+
+    def invalidate(self):
+        self.chunks.clear()
+        self._tiles.clear()
+        self._dirty.clear()
+
+    def invalidate_rect(self, gx, gy, w, h):
+        # drop the cached chunks overlapping a block of cells that changed
+        # wholesale (e.g. a generated map chunk); they re-bake when drawn
+        c = self.chunk
+        for cy in range(gy // c, (gy + h - 1) // c + 1):
+            for cx in range(gx // c, (gx + w - 1) // c + 1):
+                self.chunks.pop((cx, cy), None)
+
+    def mark_dirty(self, gx, gy):
+        if 0 <= gx < self.grid_w and 0 <= gy < self.grid_h:
+            self._dirty.add((gx, gy))
+
+    def set_tile(self, layer_index, gx, gy, gid):
+        layer = self.layers[layer_index]
+        i = gy * self.grid_w + gx
+        if layer[i] != gid:
+            layer[i] = gid
+            self.mark_dirty(gx, gy)
+
+    def tile(self, gid):
+        # oriented tile for a raw gid (flip bits included), cached per gid
+        img = self._tiles.get(gid)
+        if img is None and gid not in self._tiles:
+            img = self.tile_loader(gid & GID_MASK) if gid & GID_MASK else None
+            if img is not None and gid & (FLIP_H | FLIP_V | FLIP_D):
+                img = orient(img, gid)
+            self._tiles[gid] = img
+        return img
+
+    def _new_surface(self, opaque):
+        size = self.chunk * self.cell
+        surf = pygame.Surface((size, size), 0 if opaque else pygame.SRCALPHA)
+        try:
+            surf = surf.convert() if opaque else surf.convert_alpha()
+        except pygame.error:
+            # no display mode yet (e.g. benchmarks); keep the plain surface
+            pass
+        surf.fill(BACKGROUND_COLOR if opaque else TRANSPARENT)
+        return surf
+
+    def _draw_cell(self, surfs, gx, gy, ox=0, oy=0):
+        # redraw one cell in every layer surface of its chunk; False when a
+        # missing (empty) layer surface now needs a tile
+        cell = self.cell
+        x = gx * cell - ox
+        y = gy * cell - oy
+        rect = (x, y, cell, cell)
+        drawn = False
+        complete = True
+        i = gy * self.grid_w + gx
+        for n, layer in enumerate(self.layers):
+            surf = surfs[n]
+            if surf is not None:
+                surf.fill(BACKGROUND_COLOR if n == 0 else TRANSPARENT, rect)
+            img = self.tile(layer[i])
+            if img is None:
+                continue
+            drawn = True
+            if surf is None:
+                complete = False
+            else:
+                surf.blit(img, (x, y))
+        if not drawn and surfs and surfs[0] is not None:
+            pygame.draw.rect(surfs[0], GRID_COLOR, rect, 1)
+        return complete
+
+    def _bake_chunk(self, cx, cy):
+        gx0, gy0 = cx * self.chunk, cy * self.chunk
+        gx1 = min(gx0 + self.chunk, self.grid_w)
+        gy1 = min(gy0 + self.chunk, self.grid_h)
+        ox, oy = gx0 * self.cell, gy0 * self.cell
+        cell = self.cell
+        base = self._new_surface(True)
+        surfs = [base]
+        covered = set()
+        for n, layer in enumerate(self.layers):
+            surf = base if n == 0 else None
+            for gy in range(gy0, gy1):
+                row = gy * self.grid_w
+                for gx in range(gx0, gx1):
+                    img = self.tile(layer[row + gx])
+                    if img is None:
+                        continue
+                    if surf is None:
+                        surf = self._new_surface(False)
+                    surf.blit(img, (gx * cell - ox, gy * cell - oy))
+                    covered.add((gx, gy))
+            if n > 0:
+                surfs.append(surf)
+        for gy in range(gy0, gy1):
+            for gx in range(gx0, gx1):
+                if (gx, gy) not in covered:
+                    pygame.draw.rect(base, GRID_COLOR, (gx * cell - ox, gy * cell - oy, cell, cell), 1)
+        return surfs
+
+    def _sync(self):
+        key = self._cache_key()
+        if key != self._key:
+            self.chunks.clear()
+            self._dirty.clear()
+            self._key = key
+            if len(self.visible) != len(self.layers):
+                self.visible = [True] * len(self.layers)
+        elif self._dirty:
+            size = self.chunk * self.cell
+            for gx, gy in self._dirty:
+                cx, cy = gx // self.chunk, gy // self.chunk
+                surfs = self.chunks.get((cx, cy))
+                if surfs is not None and not self._draw_cell(surfs, gx, gy, cx * size, cy * size):
+                    # a layer that was empty in this chunk got a tile
+                    del self.chunks[(cx, cy)]
+            self._dirty.clear()
+
+    def get_chunk(self, cx, cy):
+        surfs = self.chunks.get((cx, cy))
+        if surfs is None:
+            surfs = self._bake_chunk(cx, cy)
+            self.chunks[(cx, cy)] = surfs
+            while len(self.chunks) > self.max_chunks:
+                self.chunks.popitem(last=False)
+        else:
+            self.chunks.move_to_end((cx, cy))
+        return surfs
+
+    def bake(self):
+        # pre-render every chunk (small maps, benchmarks)
+        self._sync()
+        n_x = (self.grid_w + self.chunk - 1) // self.chunk
+        n_y = (self.grid_h + self.chunk - 1) // self.chunk
+        self.max_chunks = max(self.max_chunks, n_x * n_y)
+        for cy in range(n_y):
+            for cx in range(n_x):
+                self.get_chunk(cx, cy)
+
+    def draw(self, target, origin=(0, 0)):
+        # origin: world pixel shown at the target's top-left corner
+        self._sync()
+        size = self.chunk * self.cell
+        ox, oy = origin
+        tw, th = target.get_size()
+        cx0 = max(0, ox // size)
+        cy0 = max(0, oy // size)
+        cx1 = min((self.grid_w + self.chunk - 1) // self.chunk, (ox + tw) // size + 1)
+        cy1 = min((self.grid_h + self.chunk - 1) // self.chunk, (oy + th) // size + 1)
+        visible = self.visible
+        for cy in range(cy0, cy1):
+            for cx in range(cx0, cx1):
+                pos = (cx * size - ox, cy * size - oy)
+                for n, surf in enumerate(self.get_chunk(cx, cy)):
+                    if surf is not None and (n == 0 or visible[n]):
+                        target.blit(surf, pos)
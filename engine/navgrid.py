@@ -0,0 +1,94 @@
+import random
+from collections import Counter
+
+# per-cell flags stored in NavGrid.flags
+WALKABLE = 1
+PREFERRED = 2
+
+
+def most_common_gids(gids, n=8):
+    # the most frequent non-empty tiles of a dungeon layer are its floor
+    counts = Counter(g for g in gids if g != 0)
+    return set(g for g, _ in counts.most_common(n))
+
+
+class NavGrid:
+    # Walkability of every cell packed in a bytearray (one flag byte per
+    # cell), built once when the map is loaded, plus the list of floor cells
+    # so random floor picks are O(1).
+    def __init__(self, width, height, flags=None):
+        self.width = width
+        self.height = height
+        self.flags = flags if flags is not None else bytearray([WALKABLE]) * (width * height)
+        # bumped whenever walkability changes so derived caches can refresh
+        self.version = 0
+        self.floor_cells = []
+        self.preferred_cells = []
+        self._index_cells()
+
+    @classmethod
+    def from_tiles(cls, gids, width, height, floor_gids, preferred_gids=()):
+        # preferred_gids is a subset of the floor used for goal placement
+        flags = bytearray(width * height)
+        floor_gids = set(floor_gids)
+        preferred_gids = set(preferred_gids)
+        for i, gid in enumerate(gids):
+            if gid in floor_gids:
+                flags[i] = WALKABLE | (PREFERRED if gid in preferred_gids else 0)
+        return cls(width, height, flags)
+
+    def _index_cells(self):
+        w = self.width
+        self.floor_cells = []
+        self.preferred_cells = []
+        for i, f in enumerate(self.flags):
+            if f & WALKABLE:
+                cell = (i % w, i // w)
+                self.floor_cells.append(cell)
+                if f & PREFERRED:
+                    self.preferred_cells.append(cell)
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def is_walkable(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height and self.flags[y * self.width + x] & WALKABLE != 0
+
+    def set_region(self, x0, y0, w, h, gids, floor_gids, preferred_gids=()):
+        # re-derive the flags of a rectangle from the tiles in gids (same
+        # layout as from_tiles), e.g. after a map chunk was generated; cells
+        # that become walkable are appended to the cell lists
+        lut = {}
+        for gid in floor_gids:
+            lut[gid] = WALKABLE
+        for gid in preferred_gids:
+            if gid in lut:
+                lut[gid] |= PREFERRED
+        width = self.width
+        flags = self.flags
+        lost = changed = False
+        for y in range(y0, y0 + h):
+            i = y * width + x0
+            row = gids[i:i + w]
+            for x, gid in enumerate(row, x0):
+                new = lut.get(gid, 0)
+                old = flags[i + x - x0]
+                if new == old:
+                    continue
+                changed = True
+                flags[i + x - x0] = new
+                if old & WALKABLE:
+                    lost = True
+                elif new & WALKABLE:
+                    self.floor_cells.append((x, y))
+                    if new & PREFERRED:
+                        self.preferred_cells.append((x, y))
+        if lost:
+            self._index_cells()
+        if changed:
+            self.version += 1
+
+    def random_floor_cell(self, rng=random):
+        if not self.floor_cells:
+            return None
+        return rng.choice(self.floor_cells)
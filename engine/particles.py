@@ -0,0 +1,154 @@
+import math
+import random
+from array import array
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+try:
+    import pygame
+except Exception:
+    pygame = None
+
+# alpha steps a particle fades through over its life; each (style, step) is
+# one pre-tinted surface
+FADE_LEVELS = 8
+
+
+class ParticleSystem:
+    # Cosmetic particles in preallocated columns of `capacity` entries
+    # (position, velocity, life left, lifetime, style), the live ones packed
+    # at the front. update() moves them all with a few array operations
+    # (NumPy; plain loops over array.array without it) and drops the
+    # expired ones; draw() puts them on screen with one Surface.blits() of
+    # pre-tinted square sprites, one per style and fade step, made on first
+    # use. Particles emitted while the columns are full are dropped (counted
+    # in `dropped`). They have their own RNG so effects never change the
+    # game's random sequence.
+    def __init__(self, capacity=1024, gravity=0.0, drag=0.0, seed=None):
+        self.capacity = capacity
+        self.gravity = gravity
+        self.drag = drag
+        self.rng = random.Random(seed)
+        self.n = 0
+        self.dropped = 0
+        if np is not None:
+            self.columns = {name: np.zeros(capacity) for name in ('x', 'y', 'vx', 'vy', 'life', 'ttl')}
+            self.columns['style'] = np.zeros(capacity, 'i8')
+        else:
+            self.columns = {name: array('d', bytes(8 * capacity)) for name in ('x', 'y', 'vx', 'vy', 'life', 'ttl')}
+            self.columns['style'] = array('q', bytes(8 * capacity))
+        # (color, size) per style, and the sprites made from them keyed by
+        # style * FADE_LEVELS + fade step
+        self.styles = []
+        self._sprites = {}
+
+    def __len__(self):
+        return self.n
+
+    def add_style(self, color, size=4):
+        self.styles.append((tuple(color), size))
+        return len(self.styles) - 1
+
+    def clear(self):
+        self.n = 0
+
+    def emit(self, x, y, count, style, speed=(40.0, 160.0), life=(0.3, 0.7), lift=0.0):
+        # `count` particles from (x, y) in random directions; lift is added
+        # to the upward speed
+        c = self.columns
+        rng = self.rng
+        for _ in range(count):
+            i = self.n
+            if i >= self.capacity:
+                self.dropped += 1
+                continue
+            angle = rng.uniform(0.0, 2.0 * math.pi)
+            v = rng.uniform(*speed)
+            ttl = rng.uniform(*life)
+            c['x'][i] = x
+            c['y'][i] = y
+            c['vx'][i] = math.cos(angle) * v
+            c['vy'][i] = math.sin(angle) * v - lift
+            c['life'][i] = ttl
+            c['ttl'][i] = ttl
+            c['style'][i] = style
+            self.n = i + 1
+
+    def update(self, dt):
+        n = self.n
+        if not n:
+            return
+        c = self.columns
+        damp = max(0.0, 1.0 - self.drag * dt)
+        if np is not None:
+            x, y, vx, vy, life = (c[name][:n] for name in ('x', 'y', 'vx', 'vy', 'life'))
+            life -= dt
+            vy += self.gravity * dt
+            if damp != 1.0:
+                vx *= damp
+                vy *= damp
+            x += vx * dt
+            y += vy * dt
+            alive = life > 0.0
+            if not alive.all():
+                keep = np.flatnonzero(alive)
+                for column in c.values():
+                    column[:len(keep)] = column[keep]
+                self.n = len(keep)
+            return
+        x, y, vx, vy, life, ttl, style = (c[name] for name in ('x', 'y', 'vx', 'vy', 'life', 'ttl', 'style'))
+        g = self.gravity * dt
+        m = 0
+        for i in range(n):
+            left = life[i] - dt
+            if left <= 0.0:
+                continue
+            pvx = vx[i] * damp
+            pvy = (vy[i] + g) * damp
+            x[m] = x[i] + pvx * dt
+            y[m] = y[i] + pvy * dt
+            vx[m] = pvx
+            vy[m] = pvy
+            life[m] = left
+            ttl[m] = ttl[i]
+            style[m] = style[i]
+            m += 1
+        self.n = m
+
+    def _sprite(self, key):
+        style, step = divmod(key, FADE_LEVELS)
+        color, size = self.styles[style]
+        surf = pygame.Surface((size, size), pygame.SRCALPHA)
+        surf.fill(color + (255 * (step + 1) // FADE_LEVELS,))
+        self._sprites[key] = surf
+        return surf
+
+    def draw(self, surface, offset=(0, 0)):
+        # particles are centred on their position; offset is the camera's
+        # (0, 0 for screen-space effects)
+        n = self.n
+        if not n or pygame is None:
+            return
+        c = self.columns
+        ox, oy = offset
+        if np is not None:
+            half = np.array([size // 2 for _, size in self.styles], 'i8')[c['style'][:n]]
+            px = (c['x'][:n] - ox).astype('i8') - half
+            py = (c['y'][:n] - oy).astype('i8') - half
+            step = np.minimum((c['life'][:n] / c['ttl'][:n] * FADE_LEVELS).astype('i8'), FADE_LEVELS - 1)
+            keys = (c['style'][:n] * FADE_LEVELS + step).tolist()
+            positions = zip(px.tolist(), py.tolist())
+        else:
+            keys = []
+            positions = []
+            for i in range(n):
+                style = c['style'][i]
+                half = self.styles[style][1] // 2
+                step = min(int(c['life'][i] / c['ttl'][i] * FADE_LEVELS), FADE_LEVELS - 1)
+                keys.append(style * FADE_LEVELS + step)
+                positions.append((int(c['x'][i] - ox) - half, int(c['y'][i] - oy) - half))
+        sprites = self._sprites
+        surface.blits([(sprites[k] if k in sprites else self._sprite(k), p) for k, p in zip(keys, positions)],
+                      doreturn=False)
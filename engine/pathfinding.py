@@ -0,0 +1,172 @@
+import heapq
+from array import array
+from collections import OrderedDict
+
+UNREACHABLE = -1
+
+# neighbour order also decides ties between equally short steps
+NEIGHBOURS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+
+class FlowField:
+    # BFS distance map towards a single goal cell over the walkable cells of
+    # a NavGrid. Every chaser reads its next step from the same field, and the
+    # field is only rebuilt when the goal moves to another cell.
+    def __init__(self, nav, max_distance=None):
+        self.nav = nav
+        self.max_distance = max_distance
+        self.goal = None
+        self.dist = array('i')
+        self._version = None
+        # cells the last rebuild reached: the next one resets only those,
+        # not the whole map (the BFS stops at max_distance)
+        self._visited = []
+
+    def update(self, goal):
+        if goal == self.goal and self._version == self.nav.version:
+            return False
+        self.rebuild(goal)
+        return True
+
+    def rebuild(self, goal):
+        nav = self.nav
+        w, h = nav.width, nav.height
+        flags = nav.flags
+        dist = self.dist
+        if len(dist) != w * h:
+            dist = array('i', [UNREACHABLE]) * (w * h)
+            self.dist = dist
+        else:
+            for i in self._visited:
+                dist[i] = UNREACHABLE
+        self._visited = []
+        self.goal = goal
+        self._version = nav.version
+        gx, gy = goal
+        if not (0 <= gx < w and 0 <= gy < h):
+            return
+        limit = self.max_distance
+        start = gy * w + gx
+        dist[start] = 0
+        # the visited list is the BFS queue: iterating a list sees the
+        # items appended during the loop
+        visited = self._visited
+        visited.append(start)
+        push = visited.append
+        for i in visited:
+            d = dist[i] + 1
+            if limit is not None and d > limit:
+                continue
+            x = i % w
+            # inline neighbour checks: this loop runs once per floor cell
+            if i >= w:
+                j = i - w
+                if dist[j] == UNREACHABLE and flags[j] & 1:
+                    dist[j] = d
+                    push(j)
+            if i + w < w * h:
+                j = i + w
+                if dist[j] == UNREACHABLE and flags[j] & 1:
+                    dist[j] = d
+                    push(j)
+            if x > 0:
+                j = i - 1
+                if dist[j] == UNREACHABLE and flags[j] & 1:
+                    dist[j] = d
+                    push(j)
+            if x < w - 1:
+                j = i + 1
+                if dist[j] == UNREACHABLE and flags[j] & 1:
+                    dist[j] = d
+                    push(j)
+
+    def distance(self, x, y):
+        if not self.nav.in_bounds(x, y) or not self.dist:
+            return UNREACHABLE
+        return self.dist[y * self.nav.width + x]
+
+    def next_cell(self, x, y):
+        # neighbour one step closer to the goal, or None when already there or
+        # when the goal can't be reached from (x, y)
+        if not self.dist:
+            return None
+        w = self.nav.width
+        best = None
+        best_d = self.distance(x, y)
+        if best_d == 0:
+            return None
+        for dx, dy in NEIGHBOURS:
+            nx, ny = x + dx, y + dy
+            if not self.nav.in_bounds(nx, ny):
+                continue
+            d = self.dist[ny * w + nx]
+            if d == UNREACHABLE:
+                continue
+            if best_d == UNREACHABLE or d < best_d:
+                best = (nx, ny)
+                best_d = d
+        return best
+
+
+class AStar:
+    # Point to point A* on a NavGrid with an LRU cache of found paths. The
+    # cache is dropped whenever the grid's walkability changes.
+    def __init__(self, nav, cache_size=256):
+        self.nav = nav
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self._version = nav.version
+        self.hits = 0
+        self.misses = 0
+
+    def find_path(self, start, goal):
+        # list of cells from start to goal (both included), or None. The
+        # start cell itself does not need to be walkable.
+        version = self.nav.version
+        if version != self._version:
+            self.cache.clear()
+            self._version = version
+        key = (start, goal)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return self.cache[key]
+        self.misses += 1
+        path = self._search(start, goal)
+        self.cache[key] = path
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return path
+
+    def _search(self, start, goal):
+        nav = self.nav
+        if not nav.in_bounds(*start) or not nav.is_walkable(*goal):
+            return None
+        if start == goal:
+            return [start]
+        gx, gy = goal
+        came_from = {start: None}
+        cost = {start: 0}
+        heap = [(abs(start[0] - gx) + abs(start[1] - gy), 0, start)]
+        while heap:
+            _, g, cur = heapq.heappop(heap)
+            if cur == goal:
+                path = []
+                while cur is not None:
+                    path.append(cur)
+                    cur = came_from[cur]
+                path.reverse()
+                return path
+            if g > cost[cur]:
+                continue
+            cx, cy = cur
+            for dx, dy in NEIGHBOURS:
+                nxt = (cx + dx, cy + dy)
+                if not nav.is_walkable(*nxt):
+                    continue
+                ng = g + 1
+                if ng < cost.get(nxt, ng + 1):
+                    cost[nxt] = ng
+                    came_from[nxt] = cur
+                    heapq.heappush(heap, (ng + abs(nxt[0] - gx) + abs(nxt[1] - gy), ng, nxt))
+        return None
@@ -0,0 +1,59 @@
+class Pool:
+    # Free list of objects of one class, so spawn-heavy code reuses dead
+    # objects instead of allocating new ones. acquire() takes one off the
+    # free list and runs __init__ on it again with the given arguments (so a
+    # recycled object starts exactly like a new one), or creates one when
+    # the list is empty; release() puts it back in O(1). At most `limit`
+    # objects are kept.
+    def __init__(self, cls, limit=1024):
+        self.cls = cls
+        self.limit = limit
+        self.free = []
+        self.created = 0
+        self.reused = 0
+
+    def __len__(self):
+        return len(self.free)
+
+    def acquire(self, *args, **kwargs):
+        if self.free:
+            obj = self.free.pop()
+            obj.__init__(*args, **kwargs)
+            self.reused += 1
+            return obj
+        self.created += 1
+        return self.cls(*args, **kwargs)
+
+    def take(self):
+        # a released object as it was, or a new one that __init__ hasn't
+        # run on, for callers that set every attribute themselves (loading
+        # a saved game)
+        if self.free:
+            self.reused += 1
+            return self.free.pop()
+        self.created += 1
+        return self.cls.__new__(self.cls)
+
+    def release(self, obj):
+        if len(self.free) < self.limit:
+            self.free.append(obj)
+
+    def clear(self):
+        self.free.clear()
+
+
+def swap_remove(items, indices):
+    # remove items[i] for the ascending `indices` without shifting the rest:
+    # the holes left below the new length are filled, in order, with the
+    # items kept from above it, so the cost is O(len(indices)) but the order
+    # of the rest changes. Returns the removed items. EntityStore.compact()
+    # moves its rows the same way.
+    m = len(items) - len(indices)
+    removed = [items[i] for i in indices]
+    gone = set(indices)
+    holes = [i for i in indices if i < m]
+    movers = [i for i in range(m, len(items)) if i not in gone]
+    for hole, mover in zip(holes, movers):
+        items[hole] = items[mover]
+    del items[m:]
+    return removed
@@ -0,0 +1,144 @@
+import csv
+import json
+import math
+import time
+from collections import deque
+
+FRAME = 'frame'
+
+
+class _NullScope:
+    # shared by every scope() call while profiling is off
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SCOPE = _NullScope()
+
+
+class _Scope:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, time.perf_counter())
+        return False
+
+
+def percentile(sorted_values, q):
+    # nearest-rank percentile of an already sorted sequence
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(q / 100.0 * len(sorted_values))
+    return sorted_values[min(len(sorted_values), max(1, rank)) - 1]
+
+
+class Profiler:
+    # Named timing scopes summed per frame, with the last `window` frames
+    # kept per scope for rolling p50/p95/p99. Every scope run is also kept
+    # (up to trace_limit) for the Chrome trace / CSV dumps. While disabled,
+    # scope() hands out a shared no-op context manager and frames are not
+    # timed, so the instrumentation can stay in the game loop.
+    def __init__(self, window=300, trace_limit=100000, enabled=False):
+        self.window = window
+        self.enabled = enabled
+        self.history = {}
+        self.events = deque(maxlen=trace_limit)
+        self._frame = {}
+        self._frame_start = None
+        self._epoch = time.perf_counter()
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        self._frame.clear()
+        self._frame_start = None
+
+    def toggle(self):
+        self.set_enabled(not self.enabled)
+        return self.enabled
+
+    def scope(self, name):
+        if not self.enabled:
+            return _NULL_SCOPE
+        return _Scope(self, name)
+
+    def record(self, name, start, end):
+        self._frame[name] = self._frame.get(name, 0.0) + (end - start)
+        self.events.append((name, start, end - start))
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        if self._frame_start is not None:
+            self.end_frame()
+        self._frame_start = time.perf_counter()
+
+    def end_frame(self):
+        if not self.enabled or self._frame_start is None:
+            return
+        end = time.perf_counter()
+        self.record(FRAME, self._frame_start, end)
+        self._frame_start = None
+        for name, total in self._frame.items():
+            samples = self.history.get(name)
+            if samples is None:
+                samples = self.history[name] = deque(maxlen=self.window)
+            samples.append(total * 1000.0)
+        self._frame.clear()
+
+    def reset(self):
+        self.history.clear()
+        self.events.clear()
+        self._frame.clear()
+        self._frame_start = None
+
+    def stats(self, name=FRAME):
+        # (p50, p95, p99, max) in milliseconds over the rolling window
+        values = sorted(self.history.get(name, ()))
+        if not values:
+            return (0.0, 0.0, 0.0, 0.0)
+        return (percentile(values, 50), percentile(values, 95), percentile(values, 99), values[-1])
+
+    def summary(self):
+        # frame first, then the scopes by p95
+        names = [n for n in self.history if n != FRAME]
+        rows = [(n, self.stats(n)) for n in names]
+        rows.sort(key=lambda row: -row[1][1])
+        if FRAME in self.history:
+            rows.insert(0, (FRAME, self.stats(FRAME)))
+        return rows
+
+    def overlay_lines(self):
+        lines = [f'{"":<10}{"p50":>7}{"p95":>7}{"p99":>7}']
+        for name, (p50, p95, p99, _) in self.summary():
+            lines.append(f'{name[:10]:<10}{p50:>7.2f}{p95:>7.2f}{p99:>7.2f}')
+        return lines
+
+    def dump_csv(self, path):
+        # one row per scope run: name, start and duration in microseconds
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['name', 'start_us', 'duration_us'])
+            for name, start, duration in self.events:
+                writer.writerow([name, round((start - self._epoch) * 1e6, 1), round(duration * 1e6, 1)])
+
+    def dump_chrome_trace(self, path):
+        # complete ("X") events, viewable in chrome://tracing or Perfetto
+        events = [{'name': name, 'ph': 'X', 'pid': 1, 'tid': 1,
+                   'ts': round((start - self._epoch) * 1e6, 1), 'dur': round(duration * 1e6, 1)}
+                  for name, start, duration in self.events]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
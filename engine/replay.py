@@ -0,0 +1,87 @@
+VERSION = 1
+
+
+class InputLog:
+    # Seed of a session and the actions taken in it, each tagged with the
+    # simulation step it came before, so a fixed-step simulation fed the same
+    # seed and actions repeats the session exactly. Stored as text:
+    #
+    #   replay 1
+    #   seed 1234
+    #   level dungeon 42 128x128
+    #   0 start
+    #   75 left
+    #   end 912
+    #
+    # While recording to a file every action is flushed as it happens, so a
+    # session that crashes still leaves a usable log (it then ends at its
+    # last action).
+    def __init__(self, seed, meta=None):
+        self.seed = seed
+        self.meta = dict(meta or {})
+        self.events = []
+        self.end = None
+        self._file = None
+        self._cursor = 0
+
+    def open(self, path):
+        self._file = open(path, 'w')
+        self._file.write(f'replay {VERSION}\nseed {self.seed}\n')
+        for key, value in self.meta.items():
+            self._file.write(f'{key} {value}\n')
+        for tick, action in self.events:
+            self._file.write(f'{tick} {action}\n')
+        self._file.flush()
+
+    def record(self, tick, action):
+        self.events.append((tick, action))
+        if self._file is not None:
+            self._file.write(f'{tick} {action}\n')
+            self._file.flush()
+
+    def close(self, tick):
+        self.end = tick
+        if self._file is not None:
+            self._file.write(f'end {tick}\n')
+            self._file.close()
+            self._file = None
+
+    def save(self, path):
+        self.open(path)
+        self.close(self.end if self.end is not None else self.last_tick)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            lines = [line.split(None, 1) for line in f.read().splitlines() if line.strip()]
+        if not lines or lines[0] != ['replay', str(VERSION)]:
+            raise ValueError(f'{path} is not a version {VERSION} replay')
+        meta = {}
+        events = []
+        for line in lines[1:]:
+            key, value = line[0], line[1].strip() if len(line) > 1 else ''
+            if key.isdigit():
+                events.append((int(key), value))
+            else:
+                meta[key] = value
+        log = cls(int(meta.pop('seed')), meta)
+        if 'end' in meta:
+            log.end = int(log.meta.pop('end'))
+        log.events = events
+        return log
+
+    @property
+    def last_tick(self):
+        return self.events[-1][0] if self.events else 0
+
+    def due(self, tick):
+        # actions recorded before step `tick` that haven't been replayed yet
+        actions = []
+        while self._cursor < len(self.events) and self.events[self._cursor][0] <= tick:
+            actions.append(self.events[self._cursor][1])
+            self._cursor += 1
+        return actions
+
+    def finished(self, tick):
+        end = self.end if self.end is not None else self.last_tick
+        return self._cursor >= len(self.events) and tick >= end
@@ -0,0 +1,132 @@
+import heapq
+import time
+
+# (distance, think every n ticks): entities closer than the distance think
+# that often; anything further thinks every FAR_PERIOD ticks
+PERIODS = ((8, 2), (16, 4), (32, 8))
+FAR_PERIOD = 16
+# ticks of waiting one cell of distance is worth when ranking due entities
+DISTANCE_WEIGHT = 0.25
+
+
+class ThinkScheduler:
+    # Spreads entity decisions (AI "thinks") over simulation ticks. Each
+    # entity is due again some ticks after it thought, fewer the closer it is
+    # to what matters (the hero); first thinks are staggered so entities
+    # added together don't stay in lockstep. Due entities queue by due tick
+    # plus distance * distance_weight, so near ones go first and far ones
+    # still get their turn, and run until the tick's budget is spent:
+    # budget_us of wall-clock time, or `quota` decisions when set (a
+    # wall-clock budget makes runs irreproducible). The rest stay queued for
+    # the next tick, so a large crowd thinks less often instead of the frame
+    # taking longer.
+    def __init__(self, budget_us=1000, quota=None, periods=PERIODS, far_period=FAR_PERIOD,
+                 distance_weight=DISTANCE_WEIGHT):
+        self.budget_us = budget_us
+        self.quota = quota
+        self.periods = periods
+        self.far_period = far_period
+        self.distance_weight = distance_weight
+        # (due tick, seq, entity) not due yet, and (rank, seq, entity,
+        # distance) due. _members maps each entity to the seq of its one
+        # live entry; other entries (removed entities, or entities removed
+        # and added again, e.g. recycled ones) are skipped when popped.
+        self._waiting = []
+        self._ready = []
+        self._members = {}
+        self._seq = 0
+        self.thinks = 0
+        self.decisions = 0
+
+    def __len__(self):
+        return len(self._members)
+
+    def __contains__(self, entity):
+        return entity in self._members
+
+    @property
+    def backlog(self):
+        # due entities left over from earlier ticks
+        return len(self._ready)
+
+    def add(self, entity, tick):
+        self._push(tick + self._seq % self.far_period, entity)
+
+    def remove(self, entity):
+        self._members.pop(entity, None)
+
+    def clear(self):
+        self._waiting.clear()
+        self._ready.clear()
+        self._members.clear()
+        self._seq = 0
+
+    @property
+    def next_seq(self):
+        return self._seq
+
+    def entries(self):
+        # {entity: (key, seq, distance)} for every scheduled entity: key is
+        # the due tick and distance -1 while waiting, key the rank once due.
+        # With restore() this saves and brings back the exact schedule.
+        members = self._members
+        entries = {e: (due, seq, -1) for due, seq, e in self._waiting if members.get(e) == seq}
+        entries.update({e: (rank, seq, d) for rank, seq, e, d in self._ready if members.get(e) == seq})
+        return entries
+
+    def restore(self, entries, seq):
+        # (entity, key, seq, distance) for each entry of another scheduler's
+        # entries(), and its next seq
+        self._waiting = [(key, entry_seq, entity) for entity, key, entry_seq, d in entries if d < 0]
+        self._ready = [(key, entry_seq, entity, d) for entity, key, entry_seq, d in entries if d >= 0]
+        self._members = {entity: entry_seq for entity, _, entry_seq, _ in entries}
+        heapq.heapify(self._waiting)
+        heapq.heapify(self._ready)
+        self._seq = seq
+
+    def period(self, distance):
+        for limit, period in self.periods:
+            if distance < limit:
+                return period
+        return self.far_period
+
+    def _push(self, tick, entity):
+        heapq.heappush(self._waiting, (tick, self._seq, entity))
+        self._members[entity] = self._seq
+        self._seq += 1
+
+    def run(self, tick, think, distance):
+        # think(entity, period) for due entities while the budget lasts; it
+        # returns True when it decided something (only those count against
+        # the quota). distance(entity), taken when the entity becomes due,
+        # sets its priority and think rate. Returns the number of decisions.
+        waiting = self._waiting
+        ready = self._ready
+        members = self._members
+        weight = self.distance_weight
+        heappop, heappush = heapq.heappop, heapq.heappush
+        while waiting and waiting[0][0] <= tick:
+            due, seq, entity = heappop(waiting)
+            if members.get(entity) == seq:
+                d = distance(entity)
+                heappush(ready, (due + d * weight, seq, entity, d))
+        quota = self.quota
+        deadline = time.perf_counter() + self.budget_us * 1e-6 if quota is None else None
+        thinks = decisions = 0
+        while ready:
+            if thinks and (decisions >= quota if quota is not None else time.perf_counter() >= deadline):
+                break
+            _, seq, entity, d = heappop(ready)
+            if members.get(entity) != seq:
+                continue
+            period = self.period(d)
+            if think(entity, period):
+                decisions += 1
+            thinks += 1
+            if entity in members:
+                heappush(waiting, (tick + period, self._seq, entity))
+                members[entity] = self._seq
+                self._seq += 1
+        self.thinks += thinks
+        self.decisions += decisions
+        return decisions
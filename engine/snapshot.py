@@ -0,0 +1,111 @@
+import os
+import sys
+import struct
+from array import array
+
+MAGIC = b'RLSV'
+# magic, format version, reserved
+HEADER = struct.Struct('<4sHH')
+LENGTH = struct.Struct('<I')
+# random.Random state: version, 624 words of Mersenne Twister state plus
+# the position in it, whether a gauss() value is pending, that value
+RNG_STATE = struct.Struct('<B625I?d')
+
+
+class SnapshotWriter:
+    # Builds a snapshot: a header followed by struct-packed fields, runs of
+    # fixed-size records and length-prefixed blobs, all little-endian. The
+    # layout is whatever sequence the writer used; SnapshotReader reads it
+    # back in the same sequence.
+    def __init__(self, version):
+        self.parts = [HEADER.pack(MAGIC, version, 0)]
+
+    def pack(self, record, *values):
+        self.parts.append(record.pack(*values))
+
+    def raw(self, data):
+        # bytes as they are, e.g. a run of records packed by the caller (the
+        # count isn't stored)
+        self.parts.append(data)
+
+    def blob(self, data):
+        self.parts.append(LENGTH.pack(len(data)))
+        self.parts.append(bytes(data))
+
+    def text(self, value):
+        self.blob(value.encode('utf-8'))
+
+    def array(self, typecode, values):
+        values = array(typecode, values)
+        if sys.byteorder == 'big':
+            values.byteswap()
+        self.blob(values.tobytes())
+
+    def rng(self, rng):
+        version, words, gauss = rng.getstate()
+        self.pack(RNG_STATE, version, *words, gauss is not None, gauss or 0.0)
+
+    def getvalue(self):
+        return b''.join(self.parts)
+
+
+class SnapshotReader:
+    # Reads what a SnapshotWriter wrote, in the same order. Raises
+    # ValueError for data that isn't a snapshot of this version or is cut
+    # short.
+    def __init__(self, data, version):
+        self.data = memoryview(data)
+        self.pos = 0
+        magic, found, _ = self.unpack(HEADER)
+        if magic != MAGIC:
+            raise ValueError('not a snapshot')
+        if found != version:
+            raise ValueError(f'snapshot version {found}, expected {version}')
+
+    def _take(self, size):
+        if self.pos + size > len(self.data):
+            raise ValueError('snapshot is truncated')
+        view = self.data[self.pos:self.pos + size]
+        self.pos += size
+        return view
+
+    def unpack(self, record):
+        return record.unpack(self._take(record.size))
+
+    def raw(self, size):
+        # the next size bytes as they are (e.g. records the caller unpacks)
+        return self._take(size)
+
+    def end(self):
+        # raises ValueError when something follows what was read
+        if self.pos != len(self.data):
+            raise ValueError('unexpected data at the end of the snapshot')
+
+    def blob(self):
+        return bytes(self._take(self.unpack(LENGTH)[0]))
+
+    def text(self):
+        return self.blob().decode('utf-8')
+
+    def array(self, typecode):
+        values = array(typecode)
+        values.frombytes(self.blob())
+        if sys.byteorder == 'big':
+            values.byteswap()
+        return values
+
+    def rng(self):
+        # the state for random.Random.setstate()
+        version, *words, has_gauss, gauss = self.unpack(RNG_STATE)
+        return version, tuple(words), gauss if has_gauss else None
+
+
+def write_file(path, data):
+    # replaces path atomically: a crash mid-write leaves the old file
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
@@ -0,0 +1,98 @@
+import random
+
+
+class GridCells:
+    # Read-only sequence of every (x, y) cell of a w x h grid, so "any cell"
+    # queries can sample from the grid without materialising the cell list.
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+
+    def __len__(self):
+        return self.width * self.height
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return (i % self.width, i // self.width)
+
+
+class OccupancyGrid:
+    # Cell -> entities index. Entities are registered with add() and kept up
+    # to date through move(); lookups by cell are dict hits instead of a scan
+    # over every entity.
+    def __init__(self):
+        self.cells = {}
+        self.where = {}
+
+    def __len__(self):
+        return len(self.where)
+
+    def __contains__(self, entity):
+        return entity in self.where
+
+    def clear(self):
+        self.cells.clear()
+        self.where.clear()
+
+    def rebuild(self, entities, cells):
+        # clear() and add() each entity at its cell, in one pass; the
+        # entities must be distinct
+        where = self.where
+        buckets = self.cells
+        where.clear()
+        buckets.clear()
+        for entity, cell in zip(entities, cells):
+            where[entity] = cell
+            bucket = buckets.get(cell)
+            if bucket is None:
+                buckets[cell] = [entity]
+            else:
+                bucket.append(entity)
+
+    def add(self, entity, cell):
+        if entity in self.where:
+            self.move(entity, cell)
+            return
+        self.where[entity] = cell
+        bucket = self.cells.get(cell)
+        if bucket is None:
+            self.cells[cell] = [entity]
+        else:
+            bucket.append(entity)
+
+    def remove(self, entity):
+        cell = self.where.pop(entity, None)
+        if cell is None:
+            return
+        bucket = self.cells[cell]
+        bucket.remove(entity)
+        if not bucket:
+            del self.cells[cell]
+
+    def move(self, entity, cell):
+        old = self.where.get(entity)
+        if old == cell:
+            return
+        if old is not None:
+            self.remove(entity)
+        self.add(entity, cell)
+
+    def at(self, cell):
+        return self.cells.get(cell, ())
+
+    def random_free_cell(self, cells, rng=random, attempts=32):
+        # rejection sampling is O(1) while the grid is sparsely populated;
+        # only fall back to filtering the candidates when it keeps missing
+        if not cells:
+            return None
+        for _ in range(attempts):
+            cell = rng.choice(cells)
+            if cell not in self.cells:
+                return cell
+        free = [c for c in cells if c not in self.cells]
+        if not free:
+            return None
+        return rng.choice(free)
@@ -0,0 +1,59 @@
+import os
+
+import pygame
+
+
+class Clip:
+    # Preloaded frames of one animation, shared by every entity using it.
+    # offsets are the half sizes used to center a frame on a point.
+    __slots__ = ('frames', 'offsets')
+
+    def __init__(self, frames):
+        self.frames = tuple(frames)
+        self.offsets = tuple((s.get_width() / 2, s.get_height() / 2) for s in self.frames)
+
+    def __len__(self):
+        return len(self.frames)
+
+
+class ClipRegistry:
+    # Resolves image names to surfaces once per process. clip() returns the
+    # same Clip object for the same frame names, or None when one of the
+    # frames can't be loaded.
+    def __init__(self, root='images', ext='.png'):
+        self.root = root
+        self.ext = ext
+        self._surfaces = {}
+        self._clips = {}
+
+    def surface(self, name):
+        if name in self._surfaces:
+            return self._surfaces[name]
+        surf = None
+        path = os.path.join(self.root, name + self.ext)
+        if os.path.exists(path):
+            try:
+                surf = pygame.image.load(path)
+                try:
+                    surf = surf.convert_alpha()
+                except pygame.error:
+                    # no display mode yet
+                    pass
+            except (pygame.error, OSError):
+                surf = None
+        self._surfaces[name] = surf
+        return surf
+
+    def add(self, name, surface):
+        # a frame loaded elsewhere (e.g. in the background); kept unless
+        # the name was already resolved
+        self._surfaces.setdefault(name, surface)
+
+    def clip(self, names):
+        key = tuple(names)
+        if key in self._clips:
+            return self._clips[key]
+        surfaces = [self.surface(name) for name in key]
+        clip = None if any(s is None for s in surfaces) else Clip(surfaces)
+        self._clips[key] = clip
+        return clip
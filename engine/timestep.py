@@ -0,0 +1,40 @@
+class FixedTimestep:
+    # Turns variable frame times into simulation steps of a fixed length.
+    # Frame time goes into an accumulator and every whole step in it is run;
+    # after a slow frame at most max_steps are run and the rest of the backlog
+    # is dropped (counted in `dropped`) so a slow simulation can't fall
+    # further and further behind. alpha is how far the renderer is between
+    # the last two simulation states, for interpolation.
+    def __init__(self, step=1.0 / 60.0, max_steps=5):
+        self.step = step
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.steps = 0
+        self.dropped = 0.0
+        self.last_steps = 0
+
+    def reset(self, step=None):
+        if step is not None:
+            self.step = step
+        self.accumulator = 0.0
+        self.last_steps = 0
+
+    def advance(self, dt, tick):
+        # tick(step) once per whole step accumulated; returns the step count
+        self.accumulator += dt
+        n = 0
+        while self.accumulator >= self.step and n < self.max_steps:
+            tick(self.step)
+            self.accumulator -= self.step
+            n += 1
+        if self.accumulator >= self.step:
+            backlog = self.accumulator - self.accumulator % self.step
+            self.dropped += backlog
+            self.accumulator -= backlog
+        self.steps += n
+        self.last_steps = n
+        return n
+
+    @property
+    def alpha(self):
+        return max(0.0, min(1.0, self.accumulator / self.step)) if self.step > 0 else 1.0
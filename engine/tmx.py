@@ -0,0 +1,376 @@
+import os
+import sys
+import gzip
+import json
+import mmap
+import zlib
+import base64
+import struct
+import xml.etree.ElementTree as ET
+from array import array
+
+# flip/rotation flags stored in the top bits of a TMX gid
+FLIP_H = 0x80000000
+FLIP_V = 0x40000000
+FLIP_D = 0x20000000
+GID_MASK = 0x1FFFFFFF
+
+# binary cache written next to the .tmx (<name>.tmx.cache)
+CACHE_SUFFIX = '.cache'
+CACHE_MAGIC = b'TMXC'
+CACHE_VERSION = 3
+# magic, version, source mtime (ns), source size, metadata length
+_HEADER = struct.Struct('<4sIqqI')
+
+
+def strip_flags(gids):
+    # tile ids without the flip/rotation bits, in the smallest array that fits
+    out = array('I', gids)
+    if out and max(out) > GID_MASK:
+        out = array('I', (g & GID_MASK for g in out))
+    return _narrow(out)
+
+
+def _narrow(gids):
+    # 16-bit storage when no gid (flip bits included) needs more
+    if gids.typecode == 'I' and (not gids or max(gids) < 0x10000):
+        return array('H', gids)
+    return gids
+
+
+def _decode(text, encoding, compression):
+    if encoding == 'csv':
+        # one split and int() over the whole text; int() skips the newlines
+        text = text.strip().rstrip(',')
+        return array('I', map(int, text.split(','))) if text else array('I')
+    if encoding != 'base64':
+        raise ValueError(f'unsupported TMX encoding: {encoding!r}')
+    raw = base64.b64decode(text.strip())
+    if compression == 'zlib':
+        raw = zlib.decompress(raw)
+    elif compression == 'gzip':
+        raw = gzip.decompress(raw)
+    elif compression:
+        raise ValueError(f'unsupported TMX compression: {compression!r}')
+    gids = array('I')
+    gids.frombytes(raw)
+    if sys.byteorder == 'big':
+        gids.byteswap()
+    return gids
+
+
+class MapObject:
+    # One <object> of an object group. x/y/width/height are in map pixels;
+    # type is the Tiled "class" (or the older "type" attribute).
+    __slots__ = ('id', 'name', 'type', 'group', 'x', 'y', 'width', 'height', 'gid', 'properties')
+
+    def __init__(self, id=0, name='', type='', group='', x=0.0, y=0.0, width=0.0, height=0.0,
+                 gid=0, properties=None):
+        self.id = id
+        self.name = name
+        self.type = type
+        self.group = group
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.gid = gid
+        self.properties = properties if properties is not None else {}
+
+    def to_dict(self):
+        return {k: getattr(self, k) for k in self.__slots__}
+
+
+class TileMap:
+    # Tile layers of a TMX map as flat row-major arrays ('H' when every gid
+    # fits in 16 bits, 'I' otherwise; flip bits are kept), in file order.
+    # For infinite maps the chunks are assembled into one array covering
+    # their bounds, and origin is the tile coordinate of its top-left corner.
+    # Objects of every object group are indexed by type.
+    def __init__(self, width, height, tilewidth, tileheight, layers=None, tilesets=(),
+                 infinite=False, origin=(0, 0), objects=(), hidden=()):
+        self.width = width
+        self.height = height
+        self.tilewidth = tilewidth
+        self.tileheight = tileheight
+        self.layers = layers if layers is not None else {}
+        # [{'firstgid': int, 'source': path or None}, ...], sources resolved
+        # against the map's directory
+        self.tilesets = list(tilesets)
+        self.infinite = infinite
+        self.origin = origin
+        # names of the layers saved with visible="0"
+        self.hidden = set(hidden)
+        self.objects = list(objects)
+        self.objects_by_type = {}
+        for obj in self.objects:
+            self.objects_by_type.setdefault(obj.type, []).append(obj)
+
+    def layer(self, name):
+        return self.layers.get(name)
+
+    def objects_of(self, type):
+        return self.objects_by_type.get(type, [])
+
+    def object_cell(self, obj):
+        # tile under a point object; tile objects are anchored bottom-left
+        x, y = obj.x, obj.y
+        if obj.gid:
+            y -= 1
+        return (int(x // self.tilewidth) - self.origin[0], int(y // self.tileheight) - self.origin[1])
+
+    def object_rect(self, obj):
+        # (x, y, w, h) in tiles covered by a rectangle or tile object, at
+        # least 1x1; a tile object's y is its bottom edge
+        top = obj.y - obj.height if obj.gid else obj.y
+        x0 = int(obj.x // self.tilewidth)
+        y0 = int(top // self.tileheight)
+        x1 = int(-(-(obj.x + obj.width) // self.tilewidth))
+        y1 = int(-(-(top + obj.height) // self.tileheight))
+        return (x0 - self.origin[0], y0 - self.origin[1], max(1, x1 - x0), max(1, y1 - y0))
+
+    def _meta(self):
+        return {
+            'width': self.width, 'height': self.height,
+            'tilewidth': self.tilewidth, 'tileheight': self.tileheight,
+            'tilesets': self.tilesets, 'infinite': self.infinite,
+            'origin': list(self.origin), 'hidden': sorted(self.hidden),
+            'objects': [obj.to_dict() for obj in self.objects],
+        }
+
+
+def _property(elem):
+    value = elem.get('value', elem.text or '')
+    kind = elem.get('type', 'string')
+    if kind == 'int':
+        return int(value)
+    if kind == 'float':
+        return float(value)
+    if kind == 'bool':
+        return value == 'true'
+    return value
+
+
+def _make_object(elem, group):
+    props = {p.get('name'): _property(p) for p in elem.iterfind('properties/property')}
+    return MapObject(
+        int(elem.get('id', 0)), elem.get('name', ''),
+        elem.get('class', elem.get('type', '')), group,
+        float(elem.get('x', 0)), float(elem.get('y', 0)),
+        float(elem.get('width', 0)), float(elem.get('height', 0)),
+        int(elem.get('gid', 0)), props)
+
+
+def _place_chunks(chunks, ox, oy, width, height):
+    out = array('I', [0]) * (width * height)
+    for cx, cy, cw, ch, gids in chunks:
+        for row in range(ch):
+            start = (cy - oy + row) * width + (cx - ox)
+            out[start:start + cw] = gids[row * cw:(row + 1) * cw]
+    return out
+
+
+def parse_tmx(path):
+    # Streaming parse: layer data is decoded as soon as its element ends and
+    # the element is cleared, so the XML tree never holds the whole map.
+    base = os.path.dirname(os.path.abspath(path))
+    attrs = {}
+    tilesets = []
+    layers = {}
+    chunked = {}
+    objects = []
+    hidden = []
+    name = None
+    group = None
+    encoding = compression = None
+    chunks = None
+    # inside a <tileset> (collision shapes are objects too)
+    in_tileset = 0
+    for event, elem in ET.iterparse(path, events=('start', 'end')):
+        tag = elem.tag
+        if event == 'start':
+            if tag == 'map':
+                attrs = dict(elem.attrib)
+            elif tag == 'tileset':
+                in_tileset += 1
+                tilesets.append({'firstgid': int(elem.get('firstgid', 1)), 'source': elem.get('source')})
+            elif tag == 'layer':
+                name = elem.get('name', '')
+                chunks = []
+                if elem.get('visible') == '0':
+                    hidden.append(name)
+            elif tag == 'objectgroup' and not in_tileset:
+                group = elem.get('name', '')
+            elif tag == 'data' and name is not None:
+                encoding = elem.get('encoding')
+                compression = elem.get('compression')
+            continue
+
+        if tag == 'tileset':
+            in_tileset -= 1
+            elem.clear()
+            continue
+        if group is not None:
+            if tag == 'object':
+                objects.append(_make_object(elem, group))
+                elem.clear()
+            elif tag == 'objectgroup':
+                group = None
+                elem.clear()
+            continue
+        if name is None:
+            continue
+        if tag == 'chunk':
+            gids = _decode(elem.text or '', encoding, compression) if encoding else \
+                array('I', (int(t.get('gid', 0)) for t in elem.findall('tile')))
+            chunks.append((int(elem.get('x')), int(elem.get('y')),
+                           int(elem.get('width')), int(elem.get('height')), gids))
+            elem.clear()
+        elif tag == 'data':
+            if chunks:
+                chunked[name] = chunks
+            elif encoding:
+                layers[name] = _decode(elem.text or '', encoding, compression)
+            else:
+                # deprecated <tile gid=".."/> children
+                layers[name] = array('I', (int(t.get('gid', 0)) for t in elem.findall('tile')))
+            elem.clear()
+        elif tag == 'layer':
+            name = None
+            chunks = None
+            elem.clear()
+
+    width = int(attrs.get('width', 0))
+    height = int(attrs.get('height', 0))
+    infinite = attrs.get('infinite') == '1'
+    origin = (0, 0)
+    if chunked:
+        bounds = [c for layer_chunks in chunked.values() for c in layer_chunks]
+        ox = min(c[0] for c in bounds)
+        oy = min(c[1] for c in bounds)
+        width = max(c[0] + c[2] for c in bounds) - ox
+        height = max(c[1] + c[3] for c in bounds) - oy
+        origin = (ox, oy)
+        for lname, layer_chunks in chunked.items():
+            layers[lname] = _place_chunks(layer_chunks, ox, oy, width, height)
+    return TileMap(width, height,
+                   int(attrs.get('tilewidth', 16)), int(attrs.get('tileheight', 16)),
+                   {lname: _narrow(gids) for lname, gids in layers.items()},
+                   _resolve_tilesets(tilesets, base), infinite, origin, objects, hidden)
+
+
+def _resolve_tilesets(tilesets, base):
+    # tileset sources as written in the map (relative to it) -> paths
+    return [dict(ts, source=os.path.normpath(os.path.join(base, ts['source'])) if ts['source'] else None)
+            for ts in tilesets]
+
+
+def _relative_tilesets(tilesets, base):
+    # the reverse, for the cache: it stays valid when the checkout moves
+    out = []
+    for ts in tilesets:
+        source = ts['source']
+        if source:
+            try:
+                source = os.path.relpath(source, base)
+            except ValueError:
+                # another drive (Windows); kept absolute
+                pass
+        out.append(dict(ts, source=source))
+    return out
+
+
+def cache_path(path):
+    return path + CACHE_SUFFIX
+
+
+def write_cache(tilemap, path, stat):
+    # Layout: header, JSON metadata, then the raw little-endian layer arrays,
+    # each 4-byte aligned so the file can be mapped and cast in place.
+    meta = tilemap._meta()
+    meta['tilesets'] = _relative_tilesets(meta['tilesets'], os.path.dirname(os.path.abspath(path)))
+    meta['layers'] = []
+    blobs = []
+    offset = 0
+    for lname, gids in tilemap.layers.items():
+        data = array(gids.typecode, gids)
+        if sys.byteorder == 'big':
+            data.byteswap()
+        blob = data.tobytes()
+        blob += b'\0' * (-len(blob) % 4)
+        meta['layers'].append({'name': lname, 'typecode': gids.typecode,
+                               'offset': offset, 'count': len(gids)})
+        blobs.append(blob)
+        offset += len(blob)
+    meta_bytes = json.dumps(meta).encode('utf-8')
+    meta_bytes += b' ' * (-(len(meta_bytes) + _HEADER.size) % 4)
+    header = _HEADER.pack(CACHE_MAGIC, CACHE_VERSION, stat.st_mtime_ns, stat.st_size, len(meta_bytes))
+    target = cache_path(path)
+    tmp = target + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(header)
+        f.write(meta_bytes)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp, target)
+
+
+def read_cache(path, stat):
+    # None when there is no cache or it was written for another source file
+    target = cache_path(path)
+    try:
+        f = open(target, 'rb')
+    except OSError:
+        return None
+    with f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        with mm:
+            if len(mm) < _HEADER.size:
+                return None
+            magic, version, mtime_ns, size, meta_len = _HEADER.unpack_from(mm, 0)
+            if (magic != CACHE_MAGIC or version != CACHE_VERSION
+                    or mtime_ns != stat.st_mtime_ns or size != stat.st_size):
+                return None
+            start = _HEADER.size + meta_len
+            # a truncated or partly written body reads as no cache, so the
+            # map is parsed and the cache written again
+            try:
+                meta = json.loads(mm[_HEADER.size:start].decode('utf-8'))
+                layers = {}
+                for info in meta['layers']:
+                    gids = array(info['typecode'])
+                    begin = start + info['offset']
+                    end = begin + info['count'] * gids.itemsize
+                    if begin < start or end > len(mm):
+                        return None
+                    gids.frombytes(mm[begin:end])
+                    if sys.byteorder == 'big':
+                        gids.byteswap()
+                    layers[info['name']] = gids
+                return TileMap(meta['width'], meta['height'], meta['tilewidth'], meta['tileheight'],
+                               layers, _resolve_tilesets(meta['tilesets'], os.path.dirname(os.path.abspath(path))),
+                               meta['infinite'], tuple(meta['origin']),
+                               [MapObject(**obj) for obj in meta['objects']], meta['hidden'])
+            except (ValueError, KeyError, TypeError, UnicodeDecodeError):
+                return None
+
+
+def load_tmx(path, use_cache=True):
+    # Parse a TMX file, reusing the binary cache next to it while the source
+    # keeps the same mtime and size. A cache that can't be written (read-only
+    # folder) only costs the parse on the next start.
+    stat = os.stat(path)
+    if use_cache:
+        tilemap = read_cache(path, stat)
+        if tilemap is not None:
+            return tilemap
+    tilemap = parse_tmx(path)
+    if use_cache:
+        try:
+            write_cache(tilemap, path, stat)
+        except OSError:
+            pass
+    return tilemap
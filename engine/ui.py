@@ -0,0 +1,67 @@
+import pygame
+
+
+class Button:
+    # A menu button with its background baked for the normal and hovered
+    # states. label is a string or a callable returning one (for labels that
+    # change, like the music toggle).
+    def __init__(self, name, label, color, rect):
+        self.name = name
+        self.label = label
+        self.color = color
+        self.rect = rect
+        self.center = rect.center
+        self.normal = None
+        self.hover = None
+
+    @property
+    def text(self):
+        return self.label() if callable(self.label) else self.label
+
+
+class MenuLayout:
+    # Retained-mode horizontal row of buttons centered on the screen. The
+    # layout is computed once, bake() renders every button background up
+    # front, and the same rects are used for drawing and hit-testing.
+    def __init__(self, width, height, buttons, btn_w=160, btn_h=56, spacing=24,
+                 base_alpha=int(255 * 0.5), hover_alpha=int(255 * 0.9)):
+        self.base_alpha = base_alpha
+        self.hover_alpha = hover_alpha
+        total_w = len(buttons) * btn_w + (len(buttons) - 1) * spacing
+        left = max(10, width // 2 - total_w // 2)
+        y = height // 2
+        self.buttons = []
+        for i, (name, label, color) in enumerate(buttons):
+            rect = pygame.Rect(left + i * (btn_w + spacing), y, btn_w, btn_h)
+            self.buttons.append(Button(name, label, color, rect))
+
+    def _bake_surface(self, button, tile, alpha):
+        rect = button.rect
+        if tile is not None:
+            surf = pygame.transform.scale(tile, (rect.width, rect.height)).copy()
+            surf.set_alpha(alpha)
+            return surf
+        surf = pygame.Surface((rect.width, rect.height), pygame.SRCALPHA)
+        r, g, b = button.color
+        surf.fill((r, g, b, alpha))
+        return surf
+
+    def bake(self, tile=None):
+        # tile: optional background image stretched over each button
+        for button in self.buttons:
+            button.normal = self._bake_surface(button, tile, self.base_alpha)
+            button.hover = self._bake_surface(button, tile, self.hover_alpha)
+
+    def hit_test(self, pos):
+        for button in self.buttons:
+            if button.rect.collidepoint(pos):
+                return button.name
+        return None
+
+    def draw(self, surface, mouse_pos=(0, 0)):
+        for button in self.buttons:
+            surf = button.hover if button.rect.collidepoint(mouse_pos) else button.normal
+            if surf is not None:
+                surface.blit(surf, button.rect.topleft)
+            else:
+                surface.fill(button.color, button.rect)
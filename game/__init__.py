@@ -0,0 +1,5 @@
+# The game itself, split by concern: settings (constants and paths), level
+# (map, nav grid, tiles), entities, audio, ui and loop (state, update, draw,
+# input). Importing these modules has no side effects: loop.init() loads the
+# level and main.py is the pgzero launcher. Like engine/, nothing here
+# depends on the pgzero runtime globals; the launcher hands them over.
@@ -0,0 +1,58 @@
+import os
+
+from engine.assets import AssetManager
+from game import audio
+from game.settings import WIDTH, HEIGHT, IMAGES_DIR, MENU_BG_PATH, KENNEY_ATLAS_PATH
+
+# startup assets decoded / synthesized on worker threads (engine.assets);
+# ASSET_WORKERS=1 loads them one after the other
+manager = AssetManager(workers=int(os.environ.get('ASSET_WORKERS', 4)))
+
+# what loop.init() needs before placing the hero and the enemies; the menu
+# background and the sounds keep loading behind the menu
+LEVEL_ASSETS = []
+_started = False
+
+
+def _sprite_loaded(sprite_clips, name):
+    def done(future):
+        # None for a frame that can't be decoded, so it isn't retried
+        sprite_clips.add(name, future.result() if future.exception() is None else None)
+    return done
+
+
+def start(sprite_clips, sprite_names):
+    # queue everything once; sprite frames go into the entities' clip
+    # registry as they arrive
+    global _started
+    if _started:
+        return
+    _started = True
+    if os.path.exists(KENNEY_ATLAS_PATH):
+        manager.load_image('tilesheet', KENNEY_ATLAS_PATH)
+        LEVEL_ASSETS.append('tilesheet')
+    for name in sprite_names:
+        path = os.path.join(IMAGES_DIR, name + '.png')
+        if not os.path.exists(path):
+            continue
+        manager.load_image('sprite:' + name, path).add_done_callback(_sprite_loaded(sprite_clips, name))
+        LEVEL_ASSETS.append('sprite:' + name)
+    if os.path.exists(MENU_BG_PATH):
+        manager.load_image('menu_bg', MENU_BG_PATH, (WIDTH, HEIGHT), alpha=False)
+    audio.schedule(manager)
+
+
+def started():
+    return _started
+
+
+def level_ready():
+    return _started and manager.ready(LEVEL_ASSETS)
+
+
+def get(name):
+    return manager.get(name)
+
+
+def progress():
+    return manager.progress()
@@ -0,0 +1,82 @@
+import os
+import threading
+from pathlib import Path
+
+from engine.audio import ensure_wav
+from game.settings import ROOT
+
+# synthesized sounds; a file is only rebuilt when its parameters change
+# (hashes are kept in a .synth.json manifest next to the files)
+SOUND_SPECS = {
+    'music/bg.wav': {'kind': 'tone', 'freq': 220.0, 'duration': 3.0, 'volume': 0.08},
+    'sounds/sfx.wav': {'kind': 'tone', 'freq': 880.0, 'duration': 0.15, 'volume': 0.2},
+}
+
+# pgzero's `sounds` and `music` objects, handed over by the launcher with
+# bind(); they only exist in the module pgzero runs, so headless runs and
+# benchmarks stay silent
+sounds = None
+music = None
+_prepared = threading.Event()
+
+
+def bind(sounds_obj, music_obj):
+    global sounds, music
+    sounds = sounds_obj
+    music = music_obj
+
+
+def build(path, spec):
+    # create the folder and (re)build one sound file
+    path = os.path.join(ROOT, path)
+    Path(os.path.dirname(path)).mkdir(exist_ok=True)
+    return ensure_wav(path, spec)
+
+
+def prepare():
+    for path, spec in SOUND_SPECS.items():
+        try:
+            build(path, spec)
+        except Exception:
+            pass
+    _prepared.set()
+
+
+def schedule(manager):
+    # synthesize on the asset manager's workers (engine.assets) so the
+    # window opens right away; nothing is played until every file is written
+    futures = [manager.submit('sound:' + path, build, path, spec) for path, spec in SOUND_SPECS.items()]
+
+    def done(_):
+        if all(f.done() for f in futures):
+            _prepared.set()
+    for future in futures:
+        future.add_done_callback(done)
+
+
+def ready():
+    return sounds is not None and _prepared.is_set()
+
+
+def play_sfx():
+    if ready():
+        try:
+            sounds.sfx.play()
+        except Exception:
+            pass
+
+
+def play_music():
+    if ready():
+        try:
+            music.play('bg')
+        except Exception:
+            pass
+
+
+def stop_music():
+    if music is not None:
+        try:
+            music.stop()
+        except Exception:
+            pass
@@ -0,0 +1,282 @@
+import math
+
+try:
+    from pygame import Rect
+except Exception:
+    Rect = None
+try:
+    import pygame
+except Exception:
+    pygame = None
+
+from engine.sprites import ClipRegistry
+from game import level, loop
+from game.settings import CELL, ANIM_FRAME_RATE, CHASE_SPEED, IMAGES_DIR
+
+# image animation frames, loaded on first use and shared by entities
+sprite_clips = ClipRegistry(IMAGES_DIR)
+
+
+class AnimatedEntity:
+    # slots rather than a __dict__ per entity: enemies are spawned and
+    # recycled (game.loop.enemy_pool) all game long. _store and _slot are
+    # used while an entity lives in an engine.entitystore.EntityStore.
+    __slots__ = ('cell_x', 'cell_y', 'x', 'y', 'target_x', 'target_y', 'prev_x', 'prev_y', 'speed',
+                 'frame_index', 'frame_timer', 'idle_frames', 'move_frames', 'image_frames_idle',
+                 'image_frames_move', 'idle_clip', 'move_clip', 'use_images', '_store', '_slot')
+
+    def __init__(self, cell_x, cell_y, color_frames_idle, color_frames_move, image_frames_idle=None, image_frames_move=None):
+        self.cell_x = cell_x
+        self.cell_y = cell_y
+        self.x = cell_x * CELL
+        self.y = cell_y * CELL
+        self.target_x = self.x
+        self.target_y = self.y
+        # position at the previous simulation step, for drawing in between
+        self.prev_x = self.x
+        self.prev_y = self.y
+        self.speed = 180.0  # pixels per second
+        self.frame_index = 0
+        self.frame_timer = 0.0
+        # frame tables are shared by every entity of a class, never modified
+        self.idle_frames = color_frames_idle
+        self.move_frames = color_frames_move
+        self.image_frames_idle = image_frames_idle or ()
+        self.image_frames_move = image_frames_move or ()
+        # shared preloaded clips; None when a frame is missing from images/
+        self.idle_clip = sprite_clips.clip(self.image_frames_idle)
+        self.move_clip = sprite_clips.clip(self.image_frames_move)
+        self.use_images = (len(self.image_frames_idle) + len(self.image_frames_move) > 0
+                           and self.idle_clip is not None and self.move_clip is not None)
+
+    @property
+    def is_moving(self):
+        return (self.x != self.target_x) or (self.y != self.target_y)
+
+    @property
+    def contact_cell(self):
+        return (int(self.x) // CELL, int(self.y) // CELL)
+
+    def save_pos(self):
+        self.prev_x = self.x
+        self.prev_y = self.y
+
+    def render_pos(self, alpha=1.0):
+        # alpha 0 is the previous simulation step, 1 the current one
+        return (self.prev_x + (self.x - self.prev_x) * alpha,
+                self.prev_y + (self.y - self.prev_y) * alpha)
+
+    def set_target_cell(self, cx, cy):
+        cx = max(0, min(level.GRID_W - 1, cx))
+        cy = max(0, min(level.GRID_H - 1, cy))
+        self.cell_x = cx
+        self.cell_y = cy
+        self.target_x = cx * CELL
+        self.target_y = cy * CELL
+        if self in loop.occupancy:
+            loop.occupancy.move(self, (cx, cy))
+
+    def update(self, dt):
+        # move smoothly toward target
+        dx = self.target_x - self.x
+        dy = self.target_y - self.y
+        # sqrt rather than hypot: engine.entitystore does the same arithmetic
+        # with NumPy and has to produce identical floats
+        dist = math.sqrt(dx * dx + dy * dy)
+        if dist > 1e-3:
+            step = self.speed * dt
+            if step >= dist:
+                self.x = self.target_x
+                self.y = self.target_y
+            else:
+                self.x += dx / dist * step
+                self.y += dy / dist * step
+            if self in loop.contacts:
+                loop.contacts.move(self, self.contact_cell)
+
+        # animation, skipped for entities far from the viewport
+        x0, y0, x1, y1 = loop.anim_bounds
+        if not (x0 <= self.x < x1 and y0 <= self.y < y1):
+            return
+        self.frame_timer += dt
+        frame_rate = ANIM_FRAME_RATE
+        if self.frame_timer >= 1.0 / frame_rate:
+            self.frame_timer = 0.0
+            self.frame_index = (self.frame_index + 1) % max(1, len(self.move_frames if self.is_moving else self.idle_frames))
+
+    def draw(self, screen, alpha=1.0):
+        # screen position of the entity's cell, interpolated by alpha
+        camera = loop.camera
+        x, y = self.render_pos(alpha)
+        sx = int(x) - camera.x
+        sy = int(y) - camera.y
+        if self.use_images:
+            clip = self.move_clip if self.is_moving else self.idle_clip
+            if not clip.frames:
+                return
+            i = self.frame_index % len(clip.frames)
+            ox, oy = clip.offsets[i]
+            try:
+                # centered on the cell, like an Actor positioned by its center
+                screen.surface.blit(clip.frames[i], (sx + CELL // 2 - ox, sy + CELL // 2 - oy))
+                return
+            except Exception:
+                # fallback to color drawing
+                pass
+
+        frames = self.move_frames if self.is_moving else self.idle_frames
+        if not frames:
+            return
+        color = frames[self.frame_index % len(frames)]
+        rect = Rect(sx + 8, sy + 8, CELL - 16, CELL - 16) if Rect else (sx + 8, sy + 8, CELL - 16, CELL - 16)
+        # If we have kenney tiles loaded, optionally draw hero/enemy images
+        if level.have_kenney and pygame is not None:
+            cls = getattr(self, '__class__', None)
+            name = cls.__name__ if cls is not None else ''
+            if name == 'Hero' and level.hero_sprite_tile is not None:
+                tile = level.hero_sprite_tile
+                px = sx + (CELL - tile.get_width()) // 2
+                py = sy + (CELL - tile.get_height()) // 2
+                try:
+                    screen.surface.blit(tile, (px, py))
+                    return
+                except Exception:
+                    pass
+            if name == 'Enemy' and level.enemy_sprite_tile is not None:
+                tile = level.enemy_sprite_tile
+                px = sx + (CELL - tile.get_width()) // 2
+                py = sy + (CELL - tile.get_height()) // 2
+                try:
+                    screen.surface.blit(tile, (px, py))
+                    return
+                except Exception:
+                    pass
+        screen.draw.filled_rect(rect, color)
+
+
+class Hero(AnimatedEntity):
+    __slots__ = ('hp',)
+    COLORS_IDLE = ((200, 60, 60), (220, 80, 80))
+    COLORS_MOVE = ((255, 80, 80), (200, 40, 40), (255, 80, 80), (180, 30, 30))
+    IMAGES_IDLE = ('hero_idle_1', 'hero_idle_2')
+    IMAGES_MOVE = ('hero_move_1', 'hero_move_2')
+
+    def __init__(self, cx, cy):
+        super().__init__(cx, cy, self.COLORS_IDLE, self.COLORS_MOVE, self.IMAGES_IDLE, self.IMAGES_MOVE)
+        self.hp = 5
+
+    def set_target_cell(self, cx, cy):
+        # prevent walking through walls when TMX floor info is available
+        cx = max(0, min(level.GRID_W - 1, cx))
+        cy = max(0, min(level.GRID_H - 1, cy))
+        if not level.nav.is_walkable(cx, cy):
+            return
+        super().set_target_cell(cx, cy)
+
+
+class Enemy(AnimatedEntity):
+    __slots__ = ('territory', 'path', 'path_index', 'persistent', 'visible_timer', 'visible_duration',
+                 'chase_time', 'chase_remaining', 'dead')
+    COLORS_IDLE = ((60, 60, 200), (80, 80, 220))
+    COLORS_MOVE = ((80, 80, 255), (40, 40, 200))
+    IMAGES_IDLE = ('enemy_idle_1',)
+    IMAGES_MOVE = ()
+
+    # also called again on recycled enemies (engine.pool), so it sets every
+    # slot
+    def __init__(self, cx, cy, territory_w=3, territory_h=3, persistent=False, visible_duration=8.0, chase_time=1.0, territory=None):
+        super().__init__(cx, cy, self.COLORS_IDLE, self.COLORS_MOVE, self.IMAGES_IDLE, self.IMAGES_MOVE)
+        # (x, y, w, h) in cells; centred on the spawn cell unless given
+        self.territory = territory or (max(0, cx - territory_w//2), max(0, cy - territory_h//2), territory_w, territory_h)
+        self.path = None
+        self.path_index = 0
+        self.choose_new_target()
+        self.persistent = persistent
+        self.visible_timer = 0.0
+        self.visible_duration = visible_duration
+        self.chase_time = chase_time
+        self.chase_remaining = chase_time
+        self.dead = False
+
+    def choose_new_target(self):
+        tx = loop.rng.randint(self.territory[0], min(level.GRID_W-1, self.territory[0] + self.territory[2] - 1))
+        ty = loop.rng.randint(self.territory[1], min(level.GRID_H-1, self.territory[1] + self.territory[3] - 1))
+        # walk around walls when both ends are on the floor
+        path = None
+        if level.nav.is_walkable(self.cell_x, self.cell_y):
+            with loop.profiler.scope('pathing'):
+                path = level.astar.find_path((self.cell_x, self.cell_y), (tx, ty))
+        if path:
+            self.path = path
+            self.path_index = 1
+            self.follow_path()
+        else:
+            self.path = None
+            self.set_target_cell(tx, ty)
+
+    def follow_path(self):
+        # step to the next cell of the current path; False once it's finished
+        if self.path is None or self.path_index >= len(self.path):
+            self.path = None
+            return False
+        cx, cy = self.path[self.path_index]
+        self.path_index += 1
+        self.set_target_cell(cx, cy)
+        return True
+
+    def sees_hero(self):
+        # field of view is symmetric: the hero sees us exactly when we see it
+        return level.fov.is_visible(*self.contact_cell)
+
+    def chase_step(self):
+        # next cell towards the hero from the shared flow field; straight at
+        # the hero when it can't be reached over the floor
+        step = level.flow_field.next_cell(self.cell_x, self.cell_y)
+        if step is None:
+            step = (loop.hero.cell_x, loop.hero.cell_y)
+        self.set_target_cell(step[0], step[1])
+
+    def update(self, dt):
+        # movement and timers only, every tick; decisions are made in think(),
+        # when the AI scheduler (game.loop) gets to this enemy
+        if not self.persistent:
+            self.visible_timer += dt
+            # chase hero for the first `chase_time` seconds
+            if self.chase_remaining > 0:
+                self.chase_remaining -= dt
+                # increase speed briefly while chasing
+                old_speed = self.speed
+                self.speed = max(self.speed, CHASE_SPEED)
+                super().update(dt)
+                self.speed = old_speed
+            else:
+                super().update(dt)
+            # disappear after visible_duration
+            if self.visible_timer >= self.visible_duration:
+                self.dead = True
+        else:
+            super().update(dt)
+
+    def think(self, period=1):
+        # next move once the current one is done: a step towards the hero
+        # while chasing it in sight, else the patrol. period is the number of
+        # ticks until the next think, so the patrol roll keeps its per-tick
+        # odds. False when there was nothing to decide.
+        if self.is_moving:
+            return False
+        if not self.persistent:
+            if self.chase_remaining <= 0 or not self.sees_hero():
+                return False
+            self.chase_step()
+        else:
+            self.patrol(1.0 - 0.95 ** period)
+        return True
+
+    def patrol(self, chance=0.05):
+        # standing still: continue the patrol path or maybe pick a new one
+        if not self.follow_path() and loop.rng.random() < chance:
+            self.choose_new_target()
+
+
+# every image frame the entities use, decoded in the background by game.assets
+IMAGE_NAMES = Hero.IMAGES_IDLE + Hero.IMAGES_MOVE + Enemy.IMAGES_IDLE + Enemy.IMAGES_MOVE
@@ -0,0 +1,417 @@
+import os
+import random
+import logging
+
+try:
+    import pygame
+except Exception:
+    pygame = None
+
+from engine.fov import FieldOfView
+from engine.navgrid import NavGrid, most_common_gids
+from engine.pathfinding import AStar, FlowField
+from engine.spatial import GridCells
+from engine.tmx import load_tmx, strip_flags
+from game.settings import WIDTH, HEIGHT, CELL, FOV_RADIUS, KENNEY_TILES_DIR, TMX_PATH, KENNEY_ATLAS_PATH
+
+log = logging.getLogger(__name__)
+
+# Everything below is filled in by load(): the TMX map (kenney pack) or a
+# procedural dungeon, the nav grid, the map objects, the tiles and the
+# background renderer.
+loaded = False
+have_kenney = False
+tile_cache = {}
+tile_atlas = None
+tileset_firstgid = 1
+tileset_path = None
+map_data = None
+map_tilewidth = 16
+map_tileheight = 16
+GRID_W = WIDTH // CELL
+GRID_H = HEIGHT // CELL
+map_width = GRID_W
+map_height = GRID_H
+floor_gids = set()
+explicit_floor_indices = [42, 48, 49, 50, 51, 52, 53]
+explicit_floor_gids = set()
+objects_data = None
+tmx_map = None
+# raw gids (flip bits kept) of the visible tile layers, bottom to top
+map_layers = []
+dungeon = None
+all_cells = None
+nav = None
+flow_field = None
+astar = None
+fov = None
+
+# spawn points, goals and enemy territories placed in the map's object groups,
+# by object class (or type): hero, goal, enemy, spawn and territory. Enemies
+# inside a territory patrol it; a territory's "enemies" property places that
+# many enemies in it.
+hero_start_cell = (GRID_W // 2, GRID_H // 2)
+map_goal_cells = []
+map_spawn_cells = []
+map_spawn_territory = {}
+map_enemy_specs = []
+
+hero_sprite_tile = None
+enemy_sprite_tile = None
+goal_sprite_tile = None
+goal_cell = (GRID_W - 2, GRID_H - 2)
+map_renderer = None
+
+
+def load(tilesheet=None, rng=random):
+    # load the level once; the order matters for runs replayed from a seed
+    # (territory enemies and unseeded dungeons draw from rng, the game's
+    # RNG). tilesheet: the packed kenney sheet if it was already decoded
+    # (game.assets)
+    global loaded
+    if loaded:
+        return
+    _load_tmx()
+    _load_dungeon(rng)
+    _build_nav()
+    _read_objects(rng)
+    _load_tiles(tilesheet)
+    _build_renderer()
+    loaded = True
+
+
+def _load_tmx():
+    global map_width, map_height, map_tilewidth, map_tileheight, tileset_firstgid, tileset_path
+    global map_data, floor_gids, objects_data, map_layers, have_kenney, tmx_map
+    if pygame is None or not (os.path.isdir(KENNEY_TILES_DIR) or os.path.exists(KENNEY_ATLAS_PATH)) \
+            or not os.path.exists(TMX_PATH):
+        return
+    try:
+        # streaming parse (csv/base64/zlib/gzip, infinite maps); reloads come
+        # from the binary cache next to the .tmx while it is unchanged
+        tmx_map = load_tmx(TMX_PATH)
+        map_width = tmx_map.width
+        map_height = tmx_map.height
+        map_tilewidth = tmx_map.tilewidth
+        map_tileheight = tmx_map.tileheight
+
+        # external tileset reference (used by the atlas loader)
+        if tmx_map.tilesets:
+            tileset_firstgid = tmx_map.tilesets[0]['firstgid']
+            tileset_path = tmx_map.tilesets[0]['source']
+
+        # layer named Dungeon, normalized to remove flip/rotation bits
+        layer = tmx_map.layer('Dungeon')
+        if layer is not None:
+            map_data = strip_flags(layer)
+
+        # determine most common gids (likely floor tiles)
+        try:
+            floor_gids = most_common_gids(map_data, 8)
+        except Exception:
+            floor_gids = set()
+        # Also explicitly treat specific kenney tiles as floor per user request
+        try:
+            for num in explicit_floor_indices:
+                gid = int(num) + 1
+                floor_gids.add(gid)
+                explicit_floor_gids.add(gid)
+        except Exception:
+            pass
+
+        # read Objects layer if present
+        objects_layer = tmx_map.layer('Objects')
+        if objects_layer is not None:
+            objects_data = strip_flags(objects_layer)
+
+        map_layers = [gids for name, gids in tmx_map.layers.items() if name not in tmx_map.hidden]
+
+        have_kenney = map_data is not None
+    except Exception:
+        have_kenney = False
+
+
+def _load_dungeon(rng=random):
+    # procedural level (engine.dungeon) instead of the TMX map: set
+    # DUNGEON_SEED=<int>, and optionally DUNGEON_SIZE=<w>x<h>; also used when
+    # no map could be loaded. Chunks are generated as the camera gets near
+    # them (see reveal_level).
+    global dungeon, map_width, map_height, map_data, map_layers, objects_data, floor_gids, explicit_floor_gids
+    seed = os.environ.get('DUNGEON_SEED')
+    if seed is None and have_kenney:
+        return
+    try:
+        from engine.dungeon import Dungeon
+        size = os.environ.get('DUNGEON_SIZE', '128x128').lower().split('x')
+        dungeon = Dungeon(int(seed) if seed is not None else rng.randrange(1 << 30),
+                          int(size[0]), int(size[-1]))
+        map_width = dungeon.width
+        map_height = dungeon.height
+        map_data = dungeon.gids
+        map_layers = [map_data]
+        objects_data = None
+        floor_gids = dungeon.floor_gids
+        # goals go in rooms rather than corridors
+        explicit_floor_gids = {dungeon.room_gid}
+    except Exception:
+        dungeon = None
+
+
+def _build_nav():
+    # walkability and floor cell lists, built once from the TMX floor tiles;
+    # without a map every cell is walkable. The window keeps its size and the
+    # camera scrolls over maps bigger than it.
+    global GRID_W, GRID_H, all_cells, nav, hero_start_cell
+    if have_kenney or dungeon is not None:
+        GRID_W = map_width
+        GRID_H = map_height
+    hero_start_cell = (GRID_W // 2, GRID_H // 2)
+    all_cells = GridCells(GRID_W, GRID_H)
+    if dungeon is not None:
+        # nothing is walkable until its chunk is generated
+        nav = NavGrid(GRID_W, GRID_H, bytearray(GRID_W * GRID_H))
+    elif have_kenney and map_data is not None and floor_gids:
+        nav = NavGrid.from_tiles(map_data, GRID_W, GRID_H, floor_gids, explicit_floor_gids)
+    else:
+        nav = NavGrid(GRID_W, GRID_H)
+
+
+def describe():
+    # which level was loaded, as recorded in replays (engine.replay)
+    if dungeon is not None:
+        return f'dungeon {dungeon.seed} {dungeon.width}x{dungeon.height}'
+    return 'map' if have_kenney else 'plain'
+
+
+def configure(description):
+    # make load() pick the level describe() returned in another session
+    words = (description or '').split()
+    if words[:1] == ['dungeon']:
+        os.environ['DUNGEON_SEED'] = words[1]
+        os.environ['DUNGEON_SIZE'] = words[2]
+    elif words:
+        os.environ.pop('DUNGEON_SEED', None)
+
+
+def generated_chunks():
+    # dungeon chunks in the order they were generated; nav.floor_cells (and
+    # so spawns and goals) follow that order
+    return list(dungeon.rooms) if dungeon is not None else []
+
+
+def match(description):
+    # raises ValueError unless restore() can bring back the level describe()
+    # returned as `description`: the same map, or a dungeon of the same
+    # size. Changes nothing.
+    current = describe()
+    words = description.split()
+    if dungeon is None or words[:1] != ['dungeon']:
+        if description != current:
+            raise ValueError(f'saved on level {description!r}, this is {current!r}')
+        return
+    if len(words) != 3 or words[2] != current.split()[2] or not words[1].lstrip('-').isdigit():
+        raise ValueError(f'saved on level {description!r}, this is {current!r}')
+
+
+def restore(description, chunks):
+    # turn the loaded level into the one describe() returned in a saved
+    # game, with its dungeon chunks generated in the saved order: more
+    # chunks are generated when the current ones are a prefix of it, else
+    # the dungeon is generated again from the saved seed (same size only).
+    # Raises ValueError, before changing anything, when the level can't be
+    # matched (see match()).
+    global dungeon, map_data, map_layers, floor_gids, nav, flow_field, astar, fov, hero_start_cell
+    match(description)
+    if dungeon is None:
+        return
+    words = description.split()
+    chunks = [tuple(c) for c in chunks]
+    done = list(dungeon.rooms)
+    if description != describe() or done != chunks[:len(done)]:
+        from engine.dungeon import Dungeon
+        dungeon = Dungeon(int(words[1]), dungeon.width, dungeon.height, dungeon.chunk)
+        map_data = dungeon.gids
+        map_layers = [map_data]
+        floor_gids = dungeon.floor_gids
+        nav = NavGrid(GRID_W, GRID_H, bytearray(GRID_W * GRID_H))
+        flow_field = FlowField(nav, max_distance=64)
+        astar = AStar(nav)
+        fov = FieldOfView(nav, FOV_RADIUS)
+        _build_renderer()
+        done = []
+    for cx, cy in chunks[len(done):]:
+        rect = dungeon.generate_chunk(cx, cy)
+        if rect is not None:
+            _add_chunk(*rect)
+    if dungeon.is_generated(*dungeon.start_chunk()):
+        hero_start_cell = dungeon.start_cell()
+
+
+def _add_chunk(x, y, w, h):
+    nav.set_region(x, y, w, h, dungeon.gids, floor_gids, explicit_floor_gids)
+    if map_renderer is not None:
+        map_renderer.invalidate_rect(x, y, w, h)
+
+
+def reveal_level(x0, y0, x1, y1):
+    # generate the dungeon chunks overlapping cells [x0, x1) x [y0, y1) and
+    # register their tiles with the nav grid and the map renderer
+    for rect in dungeon.ensure(x0, y0, x1, y1):
+        _add_chunk(*rect)
+
+
+def _in_grid(cell):
+    return 0 <= cell[0] < GRID_W and 0 <= cell[1] < GRID_H
+
+
+def _enemy_spec(cell, props, territory):
+    spec = {'cx': cell[0], 'cy': cell[1], 'territory': territory,
+            'persistent': bool(props.get('persistent', True))}
+    for key in ('territory_w', 'territory_h', 'visible_duration', 'chase_time'):
+        if key in props:
+            spec[key] = props[key]
+    return spec
+
+
+def _read_objects(rng=random):
+    global hero_start_cell, map_goal_cells, map_enemy_specs, flow_field, astar, fov
+    if dungeon is not None:
+        # hero in the first room of the middle chunk, the default enemies
+        # patrolling the next rooms of that chunk
+        x, y, w, h = dungeon.chunk_rect(*dungeon.start_chunk())
+        reveal_level(x, y, x + w, y + h)
+        hero_start_cell = dungeon.start_cell()
+        for rx, ry, rw, rh in dungeon.rooms[dungeon.start_chunk()][1:4]:
+            map_enemy_specs.append({'cx': rx + rw // 2, 'cy': ry + rh // 2,
+                                    'territory': (rx, ry, rw, rh), 'persistent': True})
+    elif tmx_map is not None and tmx_map.objects:
+        try:
+            territories = [tmx_map.object_rect(o) for o in tmx_map.objects_of('territory')]
+
+            def territory_of(cell):
+                for rect in territories:
+                    if rect[0] <= cell[0] < rect[0] + rect[2] and rect[1] <= cell[1] < rect[1] + rect[3]:
+                        return rect
+                return None
+
+            for obj in tmx_map.objects_of('hero')[:1]:
+                cell = tmx_map.object_cell(obj)
+                if _in_grid(cell):
+                    hero_start_cell = cell
+            map_goal_cells = [c for c in map(tmx_map.object_cell, tmx_map.objects_of('goal')) if _in_grid(c)]
+            for obj in tmx_map.objects_of('spawn'):
+                cell = tmx_map.object_cell(obj)
+                if _in_grid(cell):
+                    map_spawn_cells.append(cell)
+                    map_spawn_territory[cell] = territory_of(cell)
+            for obj in tmx_map.objects_of('enemy'):
+                cell = tmx_map.object_cell(obj)
+                if _in_grid(cell):
+                    map_enemy_specs.append(_enemy_spec(cell, obj.properties, territory_of(cell)))
+            for obj, rect in zip(tmx_map.objects_of('territory'), territories):
+                cells = [(x, y) for y in range(rect[1], rect[1] + rect[3]) for x in range(rect[0], rect[0] + rect[2])
+                         if _in_grid((x, y))]
+                floor = [c for c in cells if nav.is_walkable(*c)] or cells
+                for cell in rng.sample(floor, min(len(floor), int(obj.properties.get('enemies', 1)))):
+                    map_enemy_specs.append(_enemy_spec(cell, obj.properties, rect))
+        except Exception:
+            map_enemy_specs = []
+
+    # hero-centred distance map shared by every chasing enemy, and cached A*
+    # routes for one-off trips (patrols inside a territory)
+    flow_field = FlowField(nav, max_distance=64)
+    astar = AStar(nav)
+    # what the hero sees (fog of war, which enemies notice it)
+    fov = FieldOfView(nav, FOV_RADIUS)
+
+
+def load_tile_image_by_index(index):
+    # index is gid_mask (1-based); convert to zero-based file name
+    if index <= 0:
+        return None
+    if index in tile_cache:
+        return tile_cache[index]
+    if tile_atlas is not None:
+        # gids outside the atlas have no tile
+        tile_cache[index] = None
+        return None
+    fname = f'tile_{index-1:04d}.png'
+    path = os.path.join(KENNEY_TILES_DIR, fname)
+    if not os.path.exists(path):
+        tile_cache[index] = None
+        return None
+    try:
+        img = pygame.image.load(path).convert_alpha()
+        img = pygame.transform.scale(img, (CELL, CELL))
+        tile_cache[index] = img
+        return img
+    except Exception:
+        tile_cache[index] = None
+        return None
+
+
+def _load_tiles(tilesheet=None):
+    global tile_atlas, hero_sprite_tile, enemy_sprite_tile, goal_sprite_tile, goal_cell
+    # slice every tile out of the packed tilesheet: one decode and one scale
+    # instead of a file open per tile
+    if have_kenney and tileset_path is not None and os.path.exists(KENNEY_ATLAS_PATH):
+        try:
+            from engine.atlas import TileAtlas
+            tile_atlas = TileAtlas.from_tsx(tileset_path, tileset_firstgid, KENNEY_ATLAS_PATH, CELL, tilesheet)
+            tile_atlas.fill_cache(tile_cache)
+        except Exception:
+            # still playable: tiles are then loaded one file at a time
+            log.warning('tile atlas unavailable (tileset %s), loading tiles one by one', tileset_path,
+                        exc_info=True)
+            tile_atlas = None
+
+    if not have_kenney:
+        goal_cell = (GRID_W - 2, GRID_H - 2)
+        return
+    # user requested specific tiles
+    hero_sprite_tile = load_tile_image_by_index(98)  # tile_0097.png -> index 98 (1-based)
+    enemy_sprite_tile = load_tile_image_by_index(122)  # tile_0121.png -> index 122 (1-based)
+    goal_sprite_tile = load_tile_image_by_index(90)  # tile_0089.png -> index 90 (1-based)
+
+    # goal from the map's goal objects, else the first non-zero tile of the
+    # Objects layer
+    goal_cell = map_goal_cells[0] if map_goal_cells else None
+    try:
+        if goal_cell is None and objects_data is not None:
+            for i, v in enumerate(objects_data):
+                if v != 0:
+                    gx = i % map_width
+                    gy = i // map_width
+                    goal_cell = (gx, gy)
+                    break
+    except Exception:
+        goal_cell = None
+    if goal_cell is None:
+        # fallback to bottom-right corner
+        goal_cell = (map_width - 2, map_height - 2)
+
+
+# flat colored tiles for a generated level when the kenney tiles are missing
+plain_tiles = {}
+
+
+def load_plain_tile(index):
+    if index not in plain_tiles:
+        color = {dungeon.room_gid: (92, 84, 74), dungeon.corridor_gid: (74, 68, 62),
+                 dungeon.wall_gid: (44, 38, 56)}.get(index)
+        img = None
+        if color is not None:
+            img = pygame.Surface((CELL, CELL))
+            img.fill(color)
+        plain_tiles[index] = img
+    return plain_tiles[index]
+
+
+def _build_renderer():
+    # static map layers are baked into background chunks on first draw
+    global map_renderer
+    if pygame is None:
+        return
+    from engine.maprender import MapRenderer
+    map_renderer = MapRenderer(load_tile_image_by_index if have_kenney else load_plain_tile, CELL, GRID_W, GRID_H,
+                               map_layers if have_kenney or dungeon is not None else [])
@@ -0,0 +1,708 @@
+import os
+import sys
+import atexit
+import random
+from pathlib import Path
+
+try:
+    import pygame
+    from pygame import Rect
+except Exception:
+    pygame = None
+    Rect = None
+
+from pgzero.keyboard import keys
+
+from engine.camera import Camera
+from engine.particles import ParticleSystem
+from engine.pool import Pool, swap_remove
+from engine.profiler import Profiler
+from engine.replay import InputLog
+from engine.scheduler import ThinkScheduler
+from engine.spatial import OccupancyGrid
+from engine.timestep import FixedTimestep
+from game import assets, audio, entities, level, savegame, ui
+from game.settings import WIDTH, HEIGHT, CELL, ANIM_MARGIN, CHASE_SPEED, ANIM_FRAME_RATE, LEVEL_GEN_MARGIN, SIM_RATE, MAX_SIM_STEPS, \
+    AI_BUDGET_US, AI_QUOTA, PARTICLES, AUTOSAVE_INTERVAL
+
+# frame-time profiler (engine.profiler): F3 toggles it and its overlay, F4
+# writes profiles/frames.csv and profiles/trace.json; PROFILE=1 starts it on
+profiler = Profiler(enabled=os.environ.get('PROFILE') == '1')
+
+# Game state. 'loading' until init() has run: the first update queues the
+# startup assets on the worker pool (game.assets) and the loading screen is
+# drawn until the tiles and sprites the level needs have arrived.
+state = 'loading'
+music_on = True
+# pgzero Screen, set by the launcher (or a benchmark) before drawing
+screen = None
+frames_drawn = 0
+
+# entities indexed by the cell they are heading to (spawn / free-cell queries)
+# and by the cell they are drawn in (contact with the hero)
+occupancy = OccupancyGrid()
+contacts = OccupancyGrid()
+
+# viewport following the hero; only what is on (or near) screen is drawn
+# and animated. Created by init() once the map size is known.
+camera = None
+anim_bounds = (0, 0, 0, 0)
+
+hero = None
+enemies = []
+# NumPy structure-of-arrays enemy update (engine.entitystore); pays off with
+# large enemy counts, see set_batched_enemies()
+enemy_store = None
+# dead enemies waiting to be reused by the next spawns (engine.pool);
+# created by init(), game.entities may not be loaded yet at import
+enemy_pool = None
+goal_cell = None
+# enemy decisions, spread over the ticks by distance to the hero and capped
+# per tick (engine.scheduler); movement runs every tick for every enemy
+ai = ThinkScheduler(AI_BUDGET_US)
+# enemy spawn control
+enemy_spawn_timer = 0.0
+spawn_interval = 5.0  # seconds between spawns
+max_enemies = 8
+
+menu_ui = ui.build_menu(lambda: music_on)
+
+# hit sparks, enemies vanishing and the victory fireworks (engine.particles),
+# in world coordinates while playing and screen coordinates on the victory
+# screen; updated per drawn frame, outside the simulation
+effects = ParticleSystem(PARTICLES, gravity=240.0, drag=1.5)
+HIT_SPARKS = effects.add_style((255, 90, 60), 6)
+DESPAWN_MIST = effects.add_style((120, 120, 255), 5)
+FIREWORKS = [effects.add_style(color, 5) for color in ((255, 220, 80), (255, 120, 200), (120, 255, 160), (120, 200, 255))]
+FIREWORK_INTERVAL = 0.35
+firework_timer = 0.0
+
+# the game is simulated in fixed steps of 1/SIM_RATE s whatever the frame
+# rate; entities are drawn interpolated between their last two positions
+timestep = FixedTimestep(1.0 / SIM_RATE, MAX_SIM_STEPS)
+
+# Everything random in the game draws from `rng`, seeded by init() from
+# `seed` (GAME_SEED, else a random one). With the fixed timestep a session
+# is then fully determined by the seed and the actions taken before each
+# simulation step: RECORD=<file> writes them out (engine.replay) and
+# REPLAY=<file> plays them back, rendered here or headless at full speed
+# (headless.py --replay); live input is ignored until the replay ends.
+rng = random.Random()
+seed = None
+sim_tick = 0
+recording = None
+playback = None
+MOVES = {'left': (-1, 0), 'right': (1, 0), 'up': (0, -1), 'down': (0, 1)}
+
+# F5 saves the game and F9 loads that quicksave (game.savegame); the menu's
+# Continue loads the newer of it and the autosave. Every
+# autosave_interval seconds of play (0 turns it off) the game is
+# snapshotted and written by a worker thread, and once more on quit
+autosave_interval = AUTOSAVE_INTERVAL
+autosave_timer = 0.0
+
+
+def init():
+    # load the level and place the hero and the first enemies
+    global state, camera, anim_bounds, hero, goal_cell, seed, enemy_pool
+    if state != 'loading':
+        return
+    if playback is None and os.environ.get('REPLAY'):
+        play(InputLog.load(os.environ['REPLAY']))
+    if seed is None:
+        seed = int(os.environ['GAME_SEED']) if os.environ.get('GAME_SEED') else random.randrange(1 << 31)
+    rng.seed(seed)
+    level.load(assets.get('tilesheet'), rng)
+    ui.bake_menu(menu_ui)
+    camera = Camera(WIDTH, HEIGHT, level.GRID_W * CELL, level.GRID_H * CELL)
+    anim_bounds = camera.bounds(ANIM_MARGIN)
+    hero = entities.Hero(*level.hero_start_cell)
+    track_entity(hero)
+    enemy_pool = Pool(entities.Enemy)
+    if level.map_enemy_specs:
+        for spec in level.map_enemy_specs:
+            add_enemy(enemy_pool.acquire(**spec))
+    else:
+        for e in (enemy_pool.acquire(3, 3, 4, 4, persistent=True), enemy_pool.acquire(10, 6, 3, 5, persistent=True),
+                  enemy_pool.acquire(5, 9, 5, 3, persistent=True)):
+            add_enemy(e)
+    goal_cell = level.goal_cell
+    state = 'menu'
+    if os.environ.get('RECORD'):
+        start_recording(os.environ['RECORD'])
+
+
+def play(log):
+    # replay log from the start; call before init() so the level and the
+    # RNG are set up the way they were when it was recorded
+    global playback, seed
+    playback = log
+    seed = log.seed
+    level.configure(log.meta.get('level'))
+    ai.quota = int(log.meta.get('ai_quota', AI_QUOTA))
+    if 'step' in log.meta:
+        timestep.reset(float(log.meta['step']))
+
+
+def start_recording(path):
+    global recording
+    # a wall-clock AI budget would make the run irreproducible
+    if ai.quota is None:
+        ai.quota = AI_QUOTA
+    recording = InputLog(seed, {'level': level.describe(), 'step': repr(timestep.step), 'ai_quota': ai.quota})
+    recording.open(path)
+    atexit.register(stop_recording)
+
+
+def stop_recording():
+    global recording
+    if recording is not None:
+        recording.close(sim_tick)
+        recording = None
+
+
+def reseed(value):
+    # restart the game RNG mid-session (headless runs); recorded like an action
+    do_action(f'seed {value}')
+
+
+def do_action(action):
+    # every input that changes the simulation goes through here, so it can
+    # be recorded and replayed: left/right/up/down, start, menu, seed <n>
+    global seed
+    if recording is not None:
+        recording.record(sim_tick, action)
+    if action == 'start':
+        start_game()
+    elif action == 'menu':
+        go_to_menu()
+    elif action.startswith('seed '):
+        seed = int(action.split()[1])
+        rng.seed(seed)
+    elif action in MOVES and state == 'playing':
+        dx, dy = MOVES[action]
+        hero.set_target_cell(hero.cell_x + dx, hero.cell_y + dy)
+
+
+def replay_due():
+    # recorded actions due before the next simulation step; live input takes
+    # over once the log is exhausted
+    global playback
+    for action in playback.due(sim_tick):
+        do_action(action)
+    if playback.finished(sim_tick):
+        playback = None
+
+
+def track_entity(e):
+    occupancy.add(e, (e.cell_x, e.cell_y))
+    contacts.add(e, e.contact_cell)
+
+
+def untrack_entity(e):
+    occupancy.remove(e)
+    contacts.remove(e)
+    ai.remove(e)
+
+
+def add_enemy(e):
+    if enemy_store is not None:
+        enemy_store.add(e)
+    else:
+        enemies.append(e)
+    track_entity(e)
+    ai.add(e, sim_tick)
+
+
+def set_batched_enemies(on):
+    # move the enemies into (or out of) the NumPy entity store
+    global enemy_store, enemies
+    if on and enemy_store is None:
+        from engine.entitystore import EntityStore
+        store = EntityStore()
+        store.extend(enemies)
+        enemy_store = store
+        enemies = store.entities
+    elif not on and enemy_store is not None:
+        plain = list(enemy_store.entities)
+        enemy_store.clear()
+        enemy_store = None
+        enemies = plain
+
+
+def think_enemy(e, period):
+    try:
+        decided = e.think(period)
+    except Exception:
+        return True
+    if not e.persistent and e.chase_remaining <= 0:
+        # done chasing: nothing left to decide before it vanishes
+        ai.remove(e)
+    return decided
+
+
+def hero_distance(e):
+    # in cells, for the AI scheduler
+    x, y = e.contact_cell
+    return max(abs(x - hero.cell_x), abs(y - hero.cell_y))
+
+
+def update_enemies(dt):
+    # decisions for the enemies the AI scheduler picks this tick, then
+    # movement, animation and timers for all of them. Returns the indices
+    # of the enemies that died (the batched path finds them in the store
+    # later).
+    with profiler.scope('ai'):
+        if enemy_store is None:
+            ai.run(sim_tick, think_enemy, hero_distance)
+        else:
+            # distances and moving flags read once from the store's columns
+            # instead of per enemy through its attributes; a think only
+            # changes the enemy thinking
+            dist = enemy_store.cell_distances(CELL, hero.cell_x, hero.cell_y)
+            moving = enemy_store.moving().tolist()
+
+            def think_stored(e, period):
+                if not moving[e._slot]:
+                    return think_enemy(e, period)
+                # nothing to decide, but a finished chase still leaves the
+                # schedule, as in think_enemy
+                if not e.persistent and e.chase_remaining <= 0:
+                    ai.remove(e)
+                return False
+
+            ai.run(sim_tick, think_stored, lambda e: dist[e._slot])
+    if enemy_store is None:
+        dead = []
+        for i, e in enumerate(enemies):
+            e.update(dt)
+            if e.dead:
+                dead.append(i)
+        return dead
+    # batched path: movement, animation and timers run as array operations
+    # over the whole store
+    store = enemy_store
+    ents = store.entities
+    old_cx, old_cy = store.cells(CELL)
+    moved = store.step(dt, CHASE_SPEED, ANIM_FRAME_RATE, anim_bounds)
+    cx, cy = store.cells(CELL)
+    for i in (moved & ((cx != old_cx) | (cy != old_cy))).nonzero()[0]:
+        contacts.move(ents[i], (int(cx[i]), int(cy[i])))
+    return []
+
+
+def draw():
+    global frames_drawn
+    with profiler.scope('draw'):
+        screen.clear()
+        if state == 'loading':
+            ui.draw_loading(screen)
+        elif state == 'menu':
+            ui.draw_menu(screen, menu_ui)
+        elif state == 'playing':
+            draw_game()
+        elif state == 'victory':
+            ui.draw_victory(screen, effects)
+    if profiler.enabled:
+        ui.draw_profiler_overlay(screen, profiler)
+    profiler.end_frame()
+    frames_drawn += 1
+
+
+def dump_profile():
+    # profiles/frames.csv and profiles/trace.json (chrome://tracing, Perfetto)
+    try:
+        Path('profiles').mkdir(exist_ok=True)
+        profiler.dump_csv(os.path.join('profiles', 'frames.csv'))
+        profiler.dump_chrome_trace(os.path.join('profiles', 'trace.json'))
+    except Exception:
+        pass
+
+
+def draw_map_tiles():
+    # per-cell path, used when the cached background is unavailable
+    gx0, gy0, gx1, gy1 = camera.visible_cells(CELL, level.GRID_W, level.GRID_H)
+    for gx in range(gx0, gx1):
+        for gy in range(gy0, gy1):
+            x = gx * CELL - camera.x
+            y = gy * CELL - camera.y
+            drawn = False
+            if level.have_kenney and level.map_data is not None:
+                idx = level.map_data[gy * level.GRID_W + gx]
+                if idx > 0:
+                    img = level.load_tile_image_by_index(idx)
+                    if img is not None:
+                        try:
+                            screen.surface.blit(img, (x, y))
+                            drawn = True
+                        except Exception:
+                            drawn = False
+            if not drawn:
+                r = Rect(x, y, CELL, CELL)
+                screen.draw.rect(r, (70, 70, 70))
+
+
+# cell-high strip of the dimmed fog, cut to the length of each run of cells
+fog_strip = {'surface': None}
+
+
+def draw_fog():
+    # cells never seen are black, seen ones out of sight are dimmed; each run
+    # of same-fog cells along a row is one fill or one blit
+    fov = level.fov
+    surf = fog_strip['surface']
+    if surf is None:
+        surf = fog_strip['surface'] = pygame.Surface((WIDTH + CELL, CELL), pygame.SRCALPHA)
+        surf.fill((0, 0, 0, 150))
+    gx0, gy0, gx1, gy1 = camera.visible_cells(CELL, level.GRID_W, level.GRID_H)
+    w = level.GRID_W
+    visible = fov.visible
+    explored = fov.explored
+    fill = screen.surface.fill
+    dim = []
+    for gy in range(gy0, gy1):
+        y = gy * CELL - camera.y
+        row = gy * w
+        gx = gx0
+        while gx < gx1:
+            i = row + gx
+            if i in visible:
+                gx += 1
+                continue
+            seen = explored[i]
+            end = gx + 1
+            while end < gx1 and row + end not in visible and explored[row + end] == seen:
+                end += 1
+            x = gx * CELL - camera.x
+            if seen:
+                dim.append((surf, (x, y), (0, 0, (end - gx) * CELL, CELL)))
+            else:
+                fill((0, 0, 0), (x, y, (end - gx) * CELL, CELL))
+            gx = end
+    if dim:
+        screen.surface.blits(dim, doreturn=False)
+
+
+def draw_game():
+    # view centered on where the hero is drawn, between two simulation steps
+    alpha = timestep.alpha
+    hx, hy = hero.render_pos(alpha)
+    camera.follow(hx + CELL // 2, hy + CELL // 2)
+    # grid background (cached composite of the TMX layers if available)
+    with profiler.scope('draw.map'):
+        drawn = False
+        if level.map_renderer is not None:
+            try:
+                level.map_renderer.draw(screen.surface, camera.offset)
+                drawn = True
+            except Exception:
+                drawn = False
+        if not drawn:
+            draw_map_tiles()
+    # draw entities
+    # draw goal
+    try:
+        goal_tile = level.goal_sprite_tile
+        if level.have_kenney and goal_tile is not None:
+            gx, gy = goal_cell
+            px = gx * CELL - camera.x + (CELL - goal_tile.get_width()) // 2
+            py = gy * CELL - camera.y + (CELL - goal_tile.get_height()) // 2
+            try:
+                screen.surface.blit(goal_tile, (px, py))
+            except Exception:
+                pass
+        else:
+            # simple marker
+            screen.draw.filled_rect(Rect(goal_cell[0]*CELL-camera.x+12, goal_cell[1]*CELL-camera.y+12, CELL-24, CELL-24), (200,200,50))
+    except Exception:
+        pass
+    with profiler.scope('draw.fog'):
+        draw_fog()
+    with profiler.scope('draw.entities'):
+        hero.draw(screen, alpha)
+        fov = level.fov
+        for e in enemies:
+            if camera.is_visible(e.x, e.y, CELL, CELL) and fov.is_visible(*e.contact_cell):
+                e.draw(screen, alpha)
+    with profiler.scope('draw.effects'):
+        effects.draw(screen.surface, camera.offset)
+    # HUD
+    screen.draw.text(f'HP: {hero.hp}', topleft=(10, 10), color='white')
+
+
+def update(dt):
+    profiler.begin_frame()
+    if assets.started():
+        # convert what the workers decoded, a few ms per frame at most
+        with profiler.scope('assets'):
+            assets.manager.pump(0.004)
+    if playback is not None and state in ('menu', 'victory'):
+        replay_due()
+    if state == 'loading':
+        assets.start(entities.sprite_clips, entities.IMAGE_NAMES)
+        # load once the loading screen is on screen
+        if frames_drawn > 0 and assets.level_ready():
+            init()
+    elif state == 'playing':
+        with profiler.scope('update'):
+            timestep.advance(dt, sim_step)
+        if len(effects):
+            with profiler.scope('effects'):
+                effects.update(dt)
+    elif state == 'victory':
+        update_fireworks(dt)
+
+
+def update_fireworks(dt):
+    # a burst somewhere in the upper part of the screen every interval
+    global firework_timer
+    firework_timer -= dt
+    if firework_timer <= 0.0:
+        firework_timer = FIREWORK_INTERVAL
+        r = effects.rng
+        effects.emit(r.uniform(WIDTH * 0.15, WIDTH * 0.85), r.uniform(HEIGHT * 0.15, HEIGHT * 0.5), 40,
+                     r.choice(FIREWORKS), speed=(60.0, 200.0), life=(0.6, 1.2))
+    effects.update(dt)
+
+
+def sim_step(dt):
+    # one fixed step; the steps left in a frame after a death or victory
+    # are skipped
+    global sim_tick, playback, autosave_timer
+    if playback is not None:
+        replay_due()
+    if state != 'playing':
+        return
+    hero.save_pos()
+    if enemy_store is not None:
+        enemy_store.save_pos()
+    else:
+        for e in enemies:
+            e.save_pos()
+    update_playing(dt)
+    sim_tick += 1
+    if playback is not None and playback.finished(sim_tick):
+        playback = None
+    if autosave_interval and playback is None and state == 'playing':
+        autosave_timer += dt
+        if autosave_timer >= autosave_interval:
+            autosave_timer = 0.0
+            with profiler.scope('autosave'):
+                savegame.autosave()
+
+
+def update_playing(dt):
+    global anim_bounds, enemy_spawn_timer
+    with profiler.scope('hero'):
+        hero.update(dt)
+    camera.follow(hero.x + CELL // 2, hero.y + CELL // 2)
+    anim_bounds = camera.bounds(ANIM_MARGIN)
+    if level.dungeon is not None:
+        with profiler.scope('levelgen'):
+            level.reveal_level(*camera.visible_cells(CELL, level.GRID_W, level.GRID_H, LEVEL_GEN_MARGIN))
+    # only rebuilt when the hero moved to another cell
+    with profiler.scope('pathing'):
+        level.flow_field.update((hero.cell_x, hero.cell_y))
+    with profiler.scope('fov'):
+        level.fov.update(hero.contact_cell)
+    with profiler.scope('enemies'):
+        dead = update_enemies(dt)
+    with profiler.scope('collision'):
+        # simple collision detection: enemies drawn in the hero's cell
+        for e in list(contacts.at(hero.contact_cell)):
+            if e is not hero:
+                on_hit()
+        # remove dead enemies, O(1) each, and keep them for reuse
+        if enemy_store is not None:
+            dead = enemy_store.compact()
+        elif dead:
+            dead = swap_remove(enemies, dead)
+        for e in dead:
+            untrack_entity(e)
+            enemy_pool.release(e)
+            # only seen vanishing when in sight
+            if camera.is_visible(e.x, e.y, CELL, CELL) and level.fov.is_visible(*e.contact_cell):
+                effects.emit(e.x + CELL // 2, e.y + CELL // 2, 12, DESPAWN_MIST, speed=(10.0, 50.0),
+                             life=(0.4, 0.8), lift=60.0)
+    # spawn enemies periodically on floor cells
+    enemy_spawn_timer += dt
+    try:
+        if enemy_spawn_timer >= spawn_interval and len(enemies) < max_enemies:
+            enemy_spawn_timer = 0.0
+            with profiler.scope('spawn'):
+                # free spawn point of the map, else a random floor cell not
+                # taken by the hero or an enemy, else any free cell
+                cell = occupancy.random_free_cell(level.map_spawn_cells, rng) if level.map_spawn_cells else None
+                if cell is None:
+                    cell = occupancy.random_free_cell(level.nav.floor_cells, rng)
+                if cell is None:
+                    cell = occupancy.random_free_cell(level.all_cells, rng)
+                if cell is not None:
+                    add_enemy(enemy_pool.acquire(cell[0], cell[1], 3, 3, territory=level.map_spawn_territory.get(cell)))
+    except Exception:
+        pass
+    # check victory
+    if int(hero.x)//CELL == goal_cell[0] and int(hero.y)//CELL == goal_cell[1]:
+        on_victory()
+
+
+def on_hit():
+    if hero.hp > 0:
+        hero.hp -= 1
+        effects.emit(hero.x + CELL // 2, hero.y + CELL // 2, 16, HIT_SPARKS, life=(0.2, 0.5))
+        if audio.ready():
+            with profiler.scope('audio'):
+                audio.play_sfx()
+        if hero.hp <= 0:
+            go_to_menu()
+
+
+def go_to_menu():
+    global state
+    state = 'menu'
+    if music_on:
+        audio.stop_music()
+
+
+def on_key_down(key):
+    if key == keys.F3:
+        profiler.toggle()
+        return
+    if key == keys.F4:
+        dump_profile()
+        return
+    if key == keys.F5:
+        quicksave()
+        return
+    if key == keys.F9:
+        quickload()
+        return
+    if state != 'playing' or playback is not None:
+        return
+    # grid movement: change target cell and allow smooth movement
+    # prefer comparing to `keys` constants, fallback to attribute `name` for compatibility
+    name = getattr(key, 'name', '').lower() if key is not None else ''
+    for action in MOVES:
+        if key == getattr(keys, action.upper()) or name == action:
+            do_action(action)
+            break
+
+
+def on_mouse_down(pos):
+    global music_on
+    if state == 'menu':
+        # same layout object that draw_menu renders
+        clicked = menu_ui.hit_test(pos)
+        if clicked == 'start' and playback is None:
+            do_action('start')
+        elif clicked == 'continue':
+            continue_game()
+        elif clicked == 'music':
+            music_on = not music_on
+            if music_on:
+                audio.play_music()
+            else:
+                audio.stop_music()
+        elif clicked == 'exit':
+            quit()
+
+
+def resume():
+    # camera, level and field of view around a newly placed hero (a new or
+    # loaded game)
+    global anim_bounds, autosave_timer
+    camera.follow(hero.x + CELL // 2, hero.y + CELL // 2)
+    anim_bounds = camera.bounds(ANIM_MARGIN)
+    if level.dungeon is not None:
+        level.reveal_level(*camera.visible_cells(CELL, level.GRID_W, level.GRID_H, LEVEL_GEN_MARGIN))
+    level.fov.update(hero.contact_cell)
+    timestep.reset()
+    effects.clear()
+    autosave_timer = 0.0
+
+
+def quicksave():
+    if state != 'playing':
+        return False
+    try:
+        savegame.save(savegame.QUICKSAVE_PATH)
+        return True
+    except Exception:
+        return False
+
+
+def quickload():
+    return load_game(savegame.QUICKSAVE_PATH)
+
+
+def continue_game():
+    path = savegame.latest()
+    return path is not None and load_game(path)
+
+
+def load_game(path):
+    # not while recording or replaying: the log couldn't reproduce it
+    if state == 'loading' or recording is not None or playback is not None:
+        return False
+    try:
+        savegame.load(path)
+        return True
+    except Exception:
+        return False
+
+
+def start_game():
+    global state, hero, goal_cell
+    init()
+    untrack_entity(hero)
+    hero = entities.Hero(*level.hero_start_cell)
+    track_entity(hero)
+    level.fov.forget()
+    resume()
+    rng.shuffle(enemies)
+    if enemy_store is not None:
+        enemy_store.reorder()
+    # choose a random goal cell: one of the map's goal objects, else prefer
+    # cells that belong to the detected floor_gids (from TMX)
+    nav = level.nav
+    cell = None
+    if level.map_goal_cells:
+        cell = rng.choice(level.map_goal_cells)
+    elif nav.preferred_cells:
+        cell = rng.choice(nav.preferred_cells)
+    elif level.have_kenney and nav.floor_cells:
+        cell = nav.random_floor_cell(rng)
+    else:
+        # fallback to any cell not occupied by the hero or enemies
+        cell = occupancy.random_free_cell(level.all_cells, rng)
+
+    if cell is not None:
+        goal_cell = cell
+    else:
+        goal_cell = (max(0, level.GRID_W-2), max(0, level.GRID_H-2))
+    state = 'playing'
+    if music_on and audio.ready():
+        with profiler.scope('audio'):
+            audio.play_music()
+
+
+def on_victory():
+    global state, firework_timer
+    state = 'victory'
+    audio.stop_music()
+    # the fireworks start right away, in screen coordinates
+    effects.clear()
+    firework_timer = 0.0
+
+
+def quit():
+    stop_recording()
+    if autosave_interval and state == 'playing' and playback is None:
+        try:
+            savegame.autosave()
+            savegame.autosaver.flush()
+        except Exception:
+            pass
+    # asset jobs still queued are dropped, running ones aren't waited for
+    assets.manager.shutdown(wait=False)
+    sys.exit(0)
@@ -0,0 +1,317 @@
+import os
+import struct
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate, chain, repeat
+from operator import attrgetter
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+from engine.snapshot import SnapshotReader, SnapshotWriter, write_file
+from game import audio, entities, level, loop
+from game.settings import CELL, SAVE_DIR
+
+# Saved games: everything the simulation needs to carry on exactly as if it
+# hadn't stopped, as a snapshot (engine.snapshot) laid out as
+#
+#   level description, dungeon chunks in generation order
+#   META, RNG state, HERO
+#   ENEMY * count, enemy path cells
+#   explored cells (zlib)
+#
+# Loading replaces the running game; the level must be the same map, or a
+# dungeon of the same size (it is regenerated from the saved seed).
+VERSION = 1
+QUICKSAVE_PATH = os.path.join(SAVE_DIR, 'quick.sav')
+AUTOSAVE_PATH = os.path.join(SAVE_DIR, 'auto.sav')
+
+# game seed, simulation tick, spawn timer, spawn interval, max enemies, goal
+# cell, music on, enemy count, next AI scheduler seq
+META = struct.Struct('<qQddi2i?IQ')
+# x, y, target x/y, speed, frame timer, frame index, cell, hp
+HERO = struct.Struct('<6dI2ii')
+# x, y, target x/y, speed, frame timer, visible timer, visible duration,
+# chase remaining, frame index, persistent, dead (the fields an EntityStore
+# keeps), chase time, cell, path index, territory, path length (-1 without a
+# path), AI scheduler key, seq (-1 when not scheduled) and distance (-1
+# while waiting)
+ENEMY = struct.Struct('<9dI??d2iI4iidqi')
+ENEMY_FIELDS = ('x', 'y', 'target_x', 'target_y', 'speed', 'frame_timer', 'visible_timer', 'visible_duration',
+                'chase_remaining', 'frame_index', 'persistent', 'dead', 'chase_time', 'cell_x', 'cell_y', 'path_index')
+STORED = 12
+# values in an ENEMY record
+ENEMY_VALUES = len(ENEMY.unpack(bytes(ENEMY.size)))
+# the same record for NumPy: with it the enemy block is written and read as
+# one record array, and an EntityStore's columns are filled straight from it
+ENEMY_DTYPE = None if np is None else np.dtype(
+    [(name, '<f8') for name in ENEMY_FIELDS[:9]]
+    + [('frame_index', '<u4'), ('persistent', '?'), ('dead', '?'), ('chase_time', '<f8'), ('cell_x', '<i4'),
+       ('cell_y', '<i4'), ('path_index', '<u4'), ('territory', '<i4', (4,)), ('path_length', '<i4'),
+       ('ai_key', '<f8'), ('ai_seq', '<i8'), ('ai_distance', '<i4')])
+AI_FIELDS = ('ai_key', 'ai_seq', 'ai_distance')
+NOT_SCHEDULED = (0.0, -1, -1)
+# frame tables and clips, the same for every enemy
+VISUALS = ('idle_frames', 'move_frames', 'image_frames_idle', 'image_frames_move', 'idle_clip', 'move_clip',
+           'use_images')
+
+
+def capture():
+    # the running game as snapshot bytes; main thread, between two steps
+    hero = loop.hero
+    enemies = loop.enemies
+    store = loop.enemy_store
+    count = len(enemies)
+    paths = list(map(attrgetter('path'), enemies))
+    lengths = [-1 if path is None else len(path) for path in paths]
+    when = list(map(loop.ai.entries().get, enemies, repeat(NOT_SCHEDULED)))
+    territories = list(map(attrgetter('territory'), enemies))
+    if np is not None:
+        # the enemy block is one record array, filled a field at a time;
+        # batched enemies give whole store columns
+        records = np.empty(count, ENEMY_DTYPE)
+        if store is not None:
+            for name in ENEMY_FIELDS[:STORED]:
+                records[name] = store.columns[name][:count]
+            names = ENEMY_FIELDS[STORED:]
+        else:
+            names = ENEMY_FIELDS
+        for name, column in zip(names, zip(*map(attrgetter(*names), enemies))):
+            records[name] = column
+        for k, column in enumerate(zip(*territories)):
+            records['territory'][:, k] = column
+        records['path_length'] = lengths
+        for name, column in zip(AI_FIELDS, zip(*when)):
+            records[name] = column
+        block = records.tobytes()
+    else:
+        pack = ENEMY.pack
+        block = b''.join([pack(*values, *territory, length, *scheduled) for values, territory, length, scheduled in
+                          zip(map(attrgetter(*ENEMY_FIELDS), enemies), territories, lengths, when)])
+
+    w = SnapshotWriter(VERSION)
+    w.text(level.describe())
+    w.array('i', chain.from_iterable(level.generated_chunks()))
+    w.pack(META, loop.seed, loop.sim_tick, loop.enemy_spawn_timer, loop.spawn_interval, loop.max_enemies,
+           *loop.goal_cell, loop.music_on, count, loop.ai.next_seq)
+    w.rng(loop.rng)
+    w.pack(HERO, hero.x, hero.y, hero.target_x, hero.target_y, hero.speed, hero.frame_timer, hero.frame_index,
+           hero.cell_x, hero.cell_y, hero.hp)
+    w.raw(block)
+    # a list: array() from an iterator grows one item at a time
+    w.array('i', list(chain.from_iterable(chain.from_iterable(filter(None, paths)))))
+    w.blob(zlib.compress(level.fov.explored, 1))
+    return w.getvalue()
+
+
+def restore(data):
+    # make the snapshot the running game, in 'playing'. The whole snapshot
+    # is read and checked against the level before anything changes: a bad
+    # one raises ValueError and leaves the game as it was.
+    r = SnapshotReader(data, VERSION)
+    description = r.text()
+    coords = r.array('i')
+    seed, tick, spawn_timer, spawn_interval, max_enemies, gx, gy, music_on, count, ai_seq = r.unpack(META)
+    rng_state = r.rng()
+    hero_row = r.unpack(HERO)
+    block = r.raw(ENEMY.size * count)
+    cells = r.array('i')
+    explored = r.blob()
+    r.end()
+    try:
+        explored = zlib.decompress(explored)
+    except zlib.error as exc:
+        raise ValueError(f'bad explored cells: {exc}')
+    level.match(description)
+    if len(coords) % 2:
+        raise ValueError('bad dungeon chunk list')
+    if len(explored) != level.GRID_W * level.GRID_H:
+        raise ValueError('explored cells do not match the level')
+    # one list per ENEMY value (territory: one per side), each with a value
+    # per enemy, read from the block as a record array
+    if np is not None:
+        records = np.frombuffer(block, ENEMY_DTYPE)
+        cols = [records[name].tolist() for name in ENEMY_FIELDS]
+        cols += records['territory'].T.tolist()
+        cols += [records[name].tolist() for name in ('path_length',) + AI_FIELDS]
+    else:
+        records = None
+        cols = list(zip(*ENEMY.iter_unpack(block))) or [()] * ENEMY_VALUES
+    lengths = cols[20]
+    if 2 * sum(n for n in lengths if n > 0) != len(cells):
+        raise ValueError('enemy paths do not match the enemies')
+
+    level.restore(description, list(zip(coords[0::2], coords[1::2])))
+    hero = entities.Hero(hero_row[7], hero_row[8])
+    (hero.x, hero.y, hero.target_x, hero.target_y, hero.speed, hero.frame_timer, hero.frame_index,
+     hero.cell_x, hero.cell_y, hero.hp) = hero_row
+    hero.save_pos()
+    loop.hero = hero
+
+    # the enemies are replaced: the running game's objects are reused for
+    # them (then the pool's), and every field is set here rather than by
+    # __init__, which would draw from the game RNG
+    pool = loop.enemy_pool
+    store = loop.enemy_store
+    ents = list(loop.enemies)
+    if store is not None:
+        store.clear(detach=False)
+    else:
+        loop.enemies.clear()
+    for e in ents[count:]:
+        pool.release(e)
+    del ents[count:]
+    visuals = None
+    while len(ents) < count:
+        e = pool.take()
+        if visuals is None:
+            enemy = entities.Enemy
+            entities.AnimatedEntity.__init__(e, 0, 0, enemy.COLORS_IDLE, enemy.COLORS_MOVE, enemy.IMAGES_IDLE,
+                                             enemy.IMAGES_MOVE)
+            visuals = attrgetter(*VISUALS)(e)
+        (e.idle_frames, e.move_frames, e.image_frames_idle, e.image_frames_move, e.idle_clip, e.move_clip,
+         e.use_images) = visuals
+        ents.append(e)
+
+    it = iter(cells)
+    pairs = list(zip(it, it))
+    starts = accumulate((n if n > 0 else 0 for n in lengths), initial=0)
+    paths = [pairs[p:p + n] if n >= 0 else None for p, n in zip(starts, lengths)]
+    territories = zip(*cols[16:20])
+    if store is not None:
+        for e, chase_time, cx, cy, path_index, territory, path in zip(ents, *cols[STORED:16], territories, paths):
+            e.chase_time = chase_time
+            e.cell_x = cx
+            e.cell_y = cy
+            e.path_index = path_index
+            e.territory = territory
+            e.path = path
+        # the rest straight into the store's columns
+        values = {name: records[name] for name in ENEMY_FIELDS[:STORED]}
+        values['prev_x'] = values['x']
+        values['prev_y'] = values['y']
+        store.extend(ents, values)
+        xs, ys = store.cells(CELL)
+        contact_cells = zip(xs.tolist(), ys.tolist())
+    else:
+        for (e, x, y, tx, ty, speed, frame_timer, visible_timer, visible_duration, chase_remaining, frame_index,
+             persistent, dead, chase_time, cx, cy, path_index, territory, path) in zip(ents, *cols[:16], territories,
+                                                                                     paths):
+            e.x = e.prev_x = x
+            e.y = e.prev_y = y
+            e.target_x = tx
+            e.target_y = ty
+            e.speed = speed
+            e.frame_timer = frame_timer
+            e.visible_timer = visible_timer
+            e.visible_duration = visible_duration
+            e.chase_remaining = chase_remaining
+            e.frame_index = frame_index
+            e.persistent = persistent
+            e.dead = dead
+            e.chase_time = chase_time
+            e.cell_x = cx
+            e.cell_y = cy
+            e.path_index = path_index
+            e.territory = territory
+            e.path = path
+        loop.enemies.extend(ents)
+        if records is not None:
+            contact_cells = zip((records['x'].astype('i8') // CELL).tolist(),
+                                (records['y'].astype('i8') // CELL).tolist())
+        else:
+            contact_cells = [(int(x) // CELL, int(y) // CELL) for x, y in zip(cols[0], cols[1])]
+
+    # loop.track_entity() for the hero then every enemy, in one go
+    tracked = [hero] + ents
+    loop.occupancy.rebuild(tracked, chain(((hero.cell_x, hero.cell_y),), zip(cols[13], cols[14])))
+    loop.contacts.rebuild(tracked, chain((hero.contact_cell,), contact_cells))
+    loop.ai.restore([entry for entry in zip(ents, *cols[21:24]) if entry[2] >= 0], ai_seq)
+
+    loop.seed = seed
+    loop.rng.setstate(rng_state)
+    loop.sim_tick = tick
+    loop.enemy_spawn_timer = spawn_timer
+    loop.spawn_interval = spawn_interval
+    loop.max_enemies = max_enemies
+    loop.goal_cell = (gx, gy)
+    fov = level.fov
+    fov.explored[:] = explored
+    fov.origin = None
+    loop.resume()
+    if music_on != loop.music_on or loop.state != 'playing':
+        loop.music_on = music_on
+        if music_on and audio.ready():
+            audio.play_music()
+        else:
+            audio.stop_music()
+    loop.state = 'playing'
+
+
+def save(path):
+    write_file(path, capture())
+
+
+def load(path):
+    with open(path, 'rb') as f:
+        restore(f.read())
+
+
+def latest():
+    # the newer of the quicksave and the autosave (the menu's Continue),
+    # None without either
+    paths = [p for p in (QUICKSAVE_PATH, AUTOSAVE_PATH) if os.path.exists(p)]
+    return max(paths, key=os.path.getmtime) if paths else None
+
+
+class Autosaver:
+    # Writes snapshots on a worker thread, so the disk never holds up a
+    # frame; only capture() runs on the main thread. A snapshot submitted
+    # while another is being written waits, replacing any older one still
+    # waiting, so at most one write is ever queued.
+    def __init__(self, path=AUTOSAVE_PATH):
+        self.path = path
+        self.written = 0
+        self.failed = 0
+        self._pool = None
+        self._future = None
+        self._pending = None
+        self._lock = threading.Lock()
+
+    def submit(self, data):
+        with self._lock:
+            self._pending = data
+            if self._future is None:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='autosave')
+                self._future = self._pool.submit(self._drain)
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                data, self._pending = self._pending, None
+                if data is None:
+                    self._future = None
+                    return
+            try:
+                write_file(self.path, data)
+                self.written += 1
+            except Exception:
+                self.failed += 1
+
+    def flush(self, timeout=None):
+        # wait until everything submitted is on disk
+        with self._lock:
+            future = self._future
+        if future is not None:
+            future.result(timeout)
+
+
+autosaver = Autosaver()
+
+
+def autosave():
+    autosaver.submit(capture())
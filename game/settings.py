@@ -0,0 +1,28 @@
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WIDTH = 640
+HEIGHT = 480
+CELL = 48
+ANIM_FRAME_RATE = 6.0  # animation frames per second
+CHASE_SPEED = 240.0  # minimum speed (pixels per second) while chasing
+ANIM_MARGIN = 2 * CELL  # entities this far off screen still animate
+LEVEL_GEN_MARGIN = 8 * CELL  # generate the dungeon this far beyond the view
+AI_BUDGET_US = 1000  # time for enemy decisions per simulation step (engine.scheduler)
+AI_QUOTA = 64  # decisions per step instead, in recorded, replayed and headless runs
+FOV_RADIUS = 8  # cells the hero can see; enemies out of sight are hidden and don't chase
+SIM_RATE = 60  # simulation steps per second, independent of the frame rate
+MAX_SIM_STEPS = 5  # steps run at most per frame; the rest of a long frame is dropped
+PARTICLES = 1024  # particles alive at most (hit, despawn and victory effects)
+AUTOSAVE_INTERVAL = 30.0  # seconds of play between autosaves (game.savegame)
+
+IMAGES_DIR = os.path.join(ROOT, 'images')
+MENU_BG_PATH = os.path.join(IMAGES_DIR, 'newgamebackground.jpg')
+SAVE_DIR = os.path.join(ROOT, 'saves')
+
+# kenney tiny-dungeon pack and its sample map (optional)
+KENNEY_DIR = os.path.join(ROOT, 'kenney_tiny-dungeon')
+KENNEY_TILES_DIR = os.path.join(KENNEY_DIR, 'Tiles')
+TMX_PATH = os.path.join(KENNEY_DIR, 'Tiled', 'sampleMap.tmx')
+KENNEY_ATLAS_PATH = os.path.join(KENNEY_DIR, 'Tilemap', 'tilemap_packed.png')
@@ -0,0 +1,126 @@
+import os
+
+try:
+    import pygame
+except Exception:
+    pygame = None
+
+from engine.ui import MenuLayout
+from game import assets, level
+from game.settings import WIDTH, HEIGHT, MENU_BG_PATH
+
+# menu background when it wasn't queued on the asset workers, loaded the
+# first time the menu is drawn
+menu_bg = {'surface': None, 'loaded': False}
+
+
+def build_menu(music_on):
+    # main menu: layout computed once, button backgrounds baked by
+    # bake_menu() once the level tiles are loaded; music_on() is read
+    # whenever the label is shown
+    return MenuLayout(WIDTH, HEIGHT, [
+        ('start', 'Start Game', (40, 120, 40)),
+        ('continue', 'Continue', (40, 80, 120)),
+        ('music', lambda: f'Music: {"On" if music_on() else "Off"}', (120, 120, 40)),
+        ('exit', 'Exit', (120, 40, 40)),
+    ], btn_w=136, spacing=16)
+
+
+def bake_menu(menu_ui):
+    # tile_0040.png (index 41) behind the buttons when the kenney pack is loaded
+    try:
+        menu_ui.bake(level.load_tile_image_by_index(41) if level.have_kenney else None)
+    except Exception:
+        pass
+
+
+def menu_background():
+    if 'menu_bg' in assets.manager:
+        # None until the worker has decoded it
+        return assets.get('menu_bg')
+    if not menu_bg['loaded']:
+        menu_bg['loaded'] = True
+        if os.path.exists(MENU_BG_PATH) and pygame is not None:
+            try:
+                img = pygame.image.load(MENU_BG_PATH).convert()
+                menu_bg['surface'] = pygame.transform.scale(img, (WIDTH, HEIGHT))
+            except Exception:
+                menu_bg['surface'] = None
+    return menu_bg['surface']
+
+
+def draw_progress(screen, y):
+    # bar and count of the background asset loads, hidden once they are done
+    done, total = assets.progress()
+    if not total or done >= total:
+        return
+    w = WIDTH // 2
+    x = (WIDTH - w) // 2
+    screen.draw.rect(pygame.Rect(x, y, w, 10), (200, 200, 200))
+    screen.draw.filled_rect(pygame.Rect(x + 2, y + 2, (w - 4) * done // total, 6), (200, 200, 200))
+    screen.draw.text(f'Loading assets {done}/{total}', midtop=(WIDTH // 2, y + 16), fontsize=20, color='white')
+
+
+def draw_loading(screen):
+    screen.draw.text('Loading...', center=(WIDTH // 2, HEIGHT // 2), fontsize=48, color='white')
+    draw_progress(screen, HEIGHT // 2 + 40)
+
+
+def draw_menu(screen, menu_ui):
+    # draw background image if loaded
+    try:
+        bg = menu_background()
+        if bg is not None:
+            screen.surface.blit(bg, (0, 0))
+    except Exception:
+        pass
+
+    # mouse pos for hover
+    try:
+        mx, my = pygame.mouse.get_pos() if pygame is not None else (0, 0)
+    except Exception:
+        mx, my = (0, 0)
+
+    menu_ui.draw(screen.surface, (mx, my))
+    for button in menu_ui.buttons:
+        screen.draw.text(button.text, center=button.center, color='white')
+    draw_progress(screen, HEIGHT - 60)
+
+
+def draw_victory(screen, effects=None):
+    screen.clear()
+    if effects is not None:
+        # fireworks behind the text (engine.particles, screen coordinates)
+        effects.draw(screen.surface)
+    screen.draw.text("Você venceu!", center=(WIDTH//2, HEIGHT//2), fontsize=64, color='yellow')
+
+
+profiler_overlay = {'surface': None, 'frames': 0}
+
+
+def draw_profiler_overlay(screen, profiler):
+    # rolling frame/scope percentiles in ms, re-rendered every 15 frames
+    try:
+        ov = profiler_overlay
+        if ov['surface'] is None or ov['frames'] >= 15:
+            ov['frames'] = 0
+            font = ov.get('font')
+            if font is None:
+                font = ov['font'] = pygame.font.Font(None, 18)
+            rows = [('', 'p50', 'p95', 'p99')]
+            rows += [(name, f'{p50:.2f}', f'{p95:.2f}', f'{p99:.2f}') for name, (p50, p95, p99, _) in profiler.summary()]
+            line_h = font.get_linesize()
+            surf = pygame.Surface((264, len(rows) * line_h + 8), pygame.SRCALPHA)
+            surf.fill((0, 0, 0, 170))
+            for n, row in enumerate(rows):
+                y = 4 + n * line_h
+                surf.blit(font.render(row[0], True, (230, 230, 230)), (6, y))
+                # right-aligned number columns
+                for col, text in enumerate(row[1:]):
+                    img = font.render(text, True, (230, 230, 230))
+                    surf.blit(img, (154 + col * 52 - img.get_width(), y))
+            ov['surface'] = surf
+        ov['frames'] += 1
+        screen.surface.blit(ov['surface'], (WIDTH - ov['surface'].get_width() - 8, 8))
+    except Exception:
+        pass
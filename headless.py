@@ -0,0 +1,211 @@
+# Headless runner: drives the game logic (game.loop) one simulation step of
+# --dt seconds per tick, with scripted or random input, without opening a
+# window or playing audio.
+#
+#   python headless.py --ticks 20000 --seed 1
+#   python headless.py --script inputs.txt
+#
+# An input script has one "<tick> <action>" per line, where action is one of
+# left/right/up/down (arrow keys) or start/menu. Lines starting with '#' are
+# ignored.
+#
+#   python headless.py --ticks 5000 --seed 3 --record session.replay
+#   python headless.py --replay session.replay --profile
+#
+# --record writes the seed and every action taken to a replay file
+# (engine.replay); --replay runs one back, recorded here or in the game
+# (RECORD=<file> pgzrun main.py), as fast as possible.
+#
+#   python headless.py --ticks 3000 --seed 3 --save run.sav
+#   python headless.py --ticks 3000 --load run.sav
+#
+# --save writes a saved game (game.savegame) at the end of the run; --load
+# starts the run from one, e.g. a quicksave.
+import os
+import sys
+import time
+import random
+import argparse
+
+from engine.replay import InputLog
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+ACTIONS = ('left', 'right', 'up', 'down', 'start', 'menu')
+
+
+def load_game(seed=None, log=None):
+    # the level load converts surfaces, which needs a (dummy) display mode;
+    # sounds are never synthesized or played. seed: the game RNG's, else
+    # GAME_SEED or a random one; log: a replay to play back
+    os.chdir(ROOT)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    import pygame
+    pygame.display.init()
+    if pygame.display.get_surface() is None:
+        pygame.display.set_mode((1, 1))
+    from game import loop
+    # fixed number of enemy decisions per tick rather than a time budget, so
+    # seeded runs are reproducible
+    loop.ai.quota = loop.AI_QUOTA
+    # no autosaves from scripted, benchmark or replayed runs
+    loop.autosave_interval = 0
+    if log is not None:
+        loop.play(log)
+    elif seed is not None:
+        loop.seed = seed
+    loop.init()
+    return loop
+
+
+def read_script(path):
+    script = {}
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            tick, action = line.split()
+            if action not in ACTIONS:
+                raise ValueError(f'unknown action {action!r} in {path}')
+            script.setdefault(int(tick), []).append(action)
+    return script
+
+
+def apply_action(game, action):
+    game.do_action(action)
+
+
+def run(ticks, dt=1.0 / 60.0, seed=None, script=None, input_every=10, restart=True, game=None, batched=False):
+    # script maps tick -> actions; without one a random arrow key is pressed
+    # every `input_every` ticks. With `restart` the game goes back to
+    # 'playing' whenever it lands in the menu or on the victory screen.
+    if game is None:
+        game = load_game()
+    game.set_batched_enemies(batched)
+    # one simulation step per tick
+    game.timestep.reset(dt)
+    if seed is not None:
+        game.reseed(seed)
+    input_rng = random.Random(seed)
+    stats = {'ticks': 0, 'hits': 0, 'deaths': 0, 'victories': 0, 'spawned': 0, 'max_enemies': 0}
+    if game.state != 'playing':
+        game.do_action('start')
+    prev_state = game.state
+    t0 = time.perf_counter()
+    for tick in range(ticks):
+        if script is not None:
+            for action in script.get(tick, ()):
+                apply_action(game, action)
+        elif tick % input_every == 0:
+            apply_action(game, input_rng.choice(ACTIONS[:4]))
+
+        hp = game.hero.hp
+        count = len(game.enemies)
+        game.update(dt)
+        if game.hero.hp < hp:
+            stats['hits'] += hp - game.hero.hp
+        if len(game.enemies) > count:
+            stats['spawned'] += len(game.enemies) - count
+        stats['max_enemies'] = max(stats['max_enemies'], len(game.enemies))
+
+        state = game.state
+        if state != prev_state:
+            if state == 'victory':
+                stats['victories'] += 1
+            elif state == 'menu' and prev_state == 'playing':
+                stats['deaths'] += 1
+        if restart and state != 'playing' and script is None:
+            game.do_action('start')
+            state = game.state
+        prev_state = state
+        stats['ticks'] += 1
+    elapsed = time.perf_counter() - t0
+    stats['seconds'] = elapsed
+    stats['ticks_per_second'] = stats['ticks'] / elapsed if elapsed > 0 else float('inf')
+    stats['state'] = game.state
+    return stats
+
+
+def replay(game):
+    # the loaded replay, step by step without waiting; stops early if it
+    # can't make progress (e.g. it was cut off on the victory screen)
+    stats = {'ticks': 0, 'hits': 0, 'deaths': 0, 'victories': 0}
+    prev_state = game.state
+    t0 = time.perf_counter()
+    while game.playback is not None:
+        tick, hp = game.sim_tick, game.hero.hp
+        game.update(game.timestep.step)
+        if game.hero.hp < hp:
+            stats['hits'] += hp - game.hero.hp
+        if game.state != prev_state:
+            if game.state == 'victory':
+                stats['victories'] += 1
+            elif game.state == 'menu' and prev_state == 'playing':
+                stats['deaths'] += 1
+            prev_state = game.state
+        elif game.sim_tick == tick and game.state != 'playing':
+            break
+    elapsed = time.perf_counter() - t0
+    stats['ticks'] = game.sim_tick
+    stats['seconds'] = elapsed
+    stats['ticks_per_second'] = stats['ticks'] / elapsed if elapsed > 0 else float('inf')
+    stats['state'] = game.state
+    stats['hero'] = (game.hero.cell_x, game.hero.cell_y)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the game logic without a window.')
+    parser.add_argument('--ticks', type=int, default=10000)
+    parser.add_argument('--dt', type=float, default=1.0 / 60.0, help='simulation step in seconds')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--script', help='input script, see the module header')
+    parser.add_argument('--input-every', type=int, default=10, help='ticks between random key presses')
+    parser.add_argument('--batched', action='store_true', help='update enemies through the NumPy entity store')
+    parser.add_argument('--record', help='write the seed and actions to this replay file')
+    parser.add_argument('--replay', help='play back a replay file instead of generating input')
+    parser.add_argument('--profile', action='store_true', help='print per-scope update percentiles (ms)')
+    parser.add_argument('--save', help='write a saved game to this file at the end')
+    parser.add_argument('--load', help='start from this saved game')
+    args = parser.parse_args()
+    if args.load and (args.record or args.replay):
+        parser.error('--load cannot be combined with --record or --replay')
+
+    script = read_script(args.script) if args.script else None
+    log = InputLog.load(args.replay) if args.replay else None
+    game = load_game(args.seed, log)
+    if args.batched:
+        game.set_batched_enemies(True)
+    if args.load:
+        game.savegame.load(args.load)
+    if args.profile:
+        game.profiler.window = max(game.profiler.window, (log.end or log.last_tick) if log else args.ticks)
+        game.profiler.set_enabled(True)
+    if log is not None:
+        stats = replay(game)
+    else:
+        if args.record:
+            game.timestep.reset(args.dt)
+            game.start_recording(args.record)
+        stats = run(args.ticks, args.dt, args.seed, script, args.input_every, game=game, batched=args.batched)
+        game.stop_recording()
+    if args.save:
+        game.savegame.save(args.save)
+    for key, value in stats.items():
+        if isinstance(value, float):
+            value = f'{value:.3f}'
+        print(f'{key:>17}: {value}')
+    if args.profile:
+        game.profiler.end_frame()
+        print()
+        for line in game.profiler.overlay_lines():
+            print(line)
+
+
+if __name__ == '__main__':
+    main()